@@ -0,0 +1,17 @@
+#================ HEADLESS CORE ====================
+#Everything TF Reader does without a display: scanning and indexing trainings dirs, loading runs,
+#smoothing and ranking them. Nothing here imports tkinter or matplotlib; the Tk app (tf_reader) is built on top.
+#
+#	from core import SessionLoader, Ranking
+#
+#	loader = SessionLoader('./trainings')
+#	loader.parse_sessions()
+#	runs = loader.load_runs(loader.select_sessions("All", "All"))
+#	ranked, scores = Ranking('mean_last', last_n = 20).rank(runs)
+#	smoothed = ranked[0].smoothed(ranked[0].scalar.order_tag, 0.9)
+from sessionloader import SessionLoader, TrainingSession, LoadJob, LiveTail, get_pool, shutdown_pool
+from scalar_run import ScalarRun
+from scalar_data import ScalarData, ScalarSeries
+from smoothing import ema, ema_batch, smoothing_cache
+from ranking import Ranking, METRICS, SUMMARY_STATS, NO_DATA, compute_scores
+from decimation import minmax_decimate
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+#Series shorter than this many points per bucket are returned untouched
+_MIN_POINTS_PER_BUCKET = 4
+
+
+
+
+#Returns the indices of the first minimum and first maximum of y inside each contiguous segment
+#>segments start at starts (sorted, first one 0); every segment is non-empty
+def _segment_extrema(y, starts):
+
+	lengths = np.diff(np.append(starts, len(y)))
+	segment = np.repeat(np.arange(len(starts)), lengths)
+
+	indices = []
+
+	for reduce in (np.minimum, np.maximum):
+
+		extreme = reduce.reduceat(y, starts)
+		hits = np.flatnonzero(y == extreme[segment])
+		_, first = np.unique(segment[hits], return_index = True)
+		indices.append(hits[first])
+
+	return np.concatenate(indices)
+
+
+
+
+#================ MIN/MAX DECIMATION ====================
+#Reduces a series to what can be seen at a given pixel width: the x range is split in n_buckets equal
+#buckets (one per pixel) and only the minimum and maximum of each bucket are kept, along with the first
+#and last point; the drawn line looks the same, spikes included.
+#>x_range restricts the work to the visible range (zoom/pan); one point on each side is kept so that
+# lines still reach the plot borders
+#>x should be increasing, as steps are; otherwise the series is sorted first
+def minmax_decimate(x, y, n_buckets, x_range = None):
+
+	x = np.asarray(x)
+	y = np.asarray(y, dtype = np.float64)
+
+	if len(x) > 1 and np.any(x[1:] < x[:-1]):
+
+		order = np.argsort(x, kind = 'stable')
+		x, y = x[order], y[order]
+
+	if x_range is not None:
+
+		start = max(np.searchsorted(x, x_range[0], side = 'left') - 1, 0)
+		stop = min(np.searchsorted(x, x_range[1], side = 'right') + 1, len(x))
+		x, y = x[start:stop], y[start:stop]
+
+	n_buckets = max(int(n_buckets), 1)
+
+	if len(x) <= _MIN_POINTS_PER_BUCKET * n_buckets or not np.all(np.isfinite(y)):
+		return x, y
+
+	x0, x1 = float(x[0]), float(x[-1])
+
+	if x1 <= x0:
+		return x, y
+
+	#Contiguous buckets of the sorted series
+	bucket = np.minimum(((x - x0) * (n_buckets / (x1 - x0))).astype(np.int64), n_buckets - 1)
+	starts = np.flatnonzero(np.diff(bucket, prepend = -1))
+
+	keep = np.concatenate([[0, len(x) - 1], _segment_extrema(y, starts)])
+	keep = np.unique(keep)
+
+	return x[keep], y[keep]
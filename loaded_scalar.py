@@ -2,28 +2,24 @@ from tkinter import ttk
 import tkinter as tk
 from functools import partial
 from toplevels import InfoWindow
-import numpy as np
+from scalar_run import ScalarRun
 
 #====================LOADED SCALAR====================
 #Represents every loaded scalar an its associated label.
-#Has a reference to the data, the lines plotted, the color and
-#the parameters 
-class LoadedScalar:
+#The data and parameters are handled by ScalarRun; this class adds
+#the lines plotted, the color and the label
+class LoadedScalar(ScalarRun):
 
 	#Existing instances of the class
 	instances = []
 
-	def __init__(self, scalar, params, scalar_name, container, update_functions):
+	def __init__(self, scalar, params, scalar_name, container, update_functions, session = None, available_tags = None):
 
 		#Initialize attributes
-		self.scalar = scalar
-		self.params = params
-		self.scalar_name = scalar_name		
+		super().__init__(scalar, params, scalar_name, session, available_tags)
 		self.lines = {}
 		self.points = None
 		self.color = None
-		self.max_value = None
-		self.data = {}
 		self.update_functions = update_functions
 
 		#Instantiate ScalarLabel class
@@ -31,8 +27,6 @@ class LoadedScalar:
 
 		LoadedScalar.instances.append(self)
 
-		self.get_max(None)
-
 	#Forgets every line in the dict
 	def clear_all_lines(self):
 
@@ -42,32 +36,10 @@ class LoadedScalar:
 	#Destroy method; removes itself from the instances list
 	def destroy(self):
 
+		self.release()
 		self.label.destroy()
 		LoadedScalar.instances.remove(self)
 
-	#Load data with specific tag
-	def update_data_dict(self, scalar_choice):
-
-		if type(scalar_choice) == list:
-
-			data = [self.scalar[self.scalar['tag'] == scalar_choice[j]] for j in range(len(scalar_choice))]
-			self.data[scalar_choice[0]] = data  
-
-		else:	
-			 
-			data = self.scalar[self.scalar['tag'] == scalar_choice]   
-			self.data[scalar_choice] = data   
-
-		#Create entry for points
-		if "[Point]" not in self.data.keys():
-
-			point_tag = [tag for tag in self.scalar['tag'] if '[Point]' in tag]
-			
-			if len(point_tag)>0:
-
-				data = self.scalar[self.scalar['tag'] == point_tag[0]]
-				self.data['[Point]'] = data
-
 	@classmethod
 	#Used to retrive by other classes all existing loaded scalars
 	def get_loaded_scalars(self):
@@ -99,57 +71,6 @@ class LoadedScalar:
 
 			self.lines[scalar_choice] = line
 
-	#Updates self.max_value based on the tag (order_choice)
-	# >It's thought for plots of average values, so the value
-	#  considered max is the one belonging to the last epoch
-	def get_max(self, order_choice):
-
-
-		for j, tag in enumerate(self.scalar['tag']):
-
-			if order_choice == None:
-
-				if "Avg" in tag and "Network" in tag and "Test" in tag and not "Best" in tag:
-
-					x = self.scalar[self.scalar['tag'].values == tag]
-					max_value = x['value'].values[-1]
-					break
-
-				#Handles when the tag is not found
-				#>could be caused by a training never finished
-				else:
-					
-					if j == len(self.scalar['tag']) - 1:                        
-
-						max_value = -1000
-
-			else:
-
-				if '(3)' in order_choice:
-
-					new_key = order_choice.strip(' (3)') 
-					key = [(new_key + f' - {i}:') for i in range(1,4)][0]
-					
-
-				else:
-							      
-					key = order_choice
-
-				x = self.scalar[self.scalar['tag'].values == key]
-
-				if len(x) > 0:
-
-					max_value = x['value'].values[-1]
-					break
-
-				else:
-
-					max_value = -1000
-					break
-
-		self.max_value = max_value
-		return self.max_value
-
 	#Detaches its label GUI element from root 
 	def remove_gui(self):
 
@@ -171,6 +92,31 @@ class LoadedScalar:
 		plot_container.fast_update()
 
 
+	#Highlights its lines in every plot, or removes the highlight; used on label hover
+	#>the lines are blitted over each plot's cached background, plots are not redrawn
+	def highlight(self, on):
+
+		lines = []
+
+		if on:
+
+			for key, value in self.lines.items():
+
+				if key == '[Point]' or value == None:
+					continue
+
+				lines.extend(value if type(value) == list else [value])
+
+		plot_container = self.label.master.master.master.master.plot_container
+		plot_container.highlight(lines)
+
+	#Removes its lines from every plot
+	def remove_artists(self):
+
+		plot_container = self.label.master.master.master.master.plot_container
+		plot_container.remove_scalar(self)
+
+
 	#Bringup Info window if there is no toplevel already; instantiated by every Info button
 	def info_win_bringup(self, params, scalar_name):
 
@@ -214,58 +160,14 @@ class ScalarLabel(ttk.Label):
 	def on_enter(self, event):
 
 		self.configure(foreground = '#000000')
-		for i, key in enumerate(self.parent.lines.keys()):
-
-
-			if key == '[Point]':
-
-				continue
-
-			value = self.parent.lines[key]
-
-			if not value == None:
-
-				if type(value) == list:
-
-					for line in value:
-
-						line.set_linewidth(3)
-
-				else:
-
-					value.set_linewidth(3)
-
-		self.parent.fast_update()
+		self.parent.highlight(True)
 
 
 	#Hover functions
 	def on_leave(self, event):
 
 		self.configure(foreground = self.parent.color)
-		for i, key in enumerate(self.parent.lines.keys()):
-
-
-			if key == '[Point]':
-
-				continue
-
-			value = self.parent.lines[key]
-
-			if not value == None:
-
-				if type(value) == list:
-
-					for line in value:
-			
-						line.set_linewidth(1)
-
-				else:
-
-					value.set_linewidth(1)
-
-			
-
-		self.parent.fast_update()
+		self.parent.highlight(False)
 
 
 
@@ -273,32 +175,9 @@ class ScalarLabel(ttk.Label):
 	def remove_lines(self):
 
 		#Undraw lines
-		for i, key in enumerate(self.parent.lines.keys()):
-
-			value = self.parent.lines[key]
-		
-			if key == '[Point]':
-
-				value.remove()
-				continue
-			
-
-			if not value == None:
-
-				if type(value) == list:
-
-					for line in value:
-
-						line.remove()
-
-				else:
-
-					value.remove()
-
-		self.parent.fast_update()
+		self.parent.remove_artists()
 
 		self.info_button.destroy()
 		self.remove_button.destroy()		
 		self.parent.destroy()
 
-	
\ No newline at end of file
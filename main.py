@@ -1,5 +1,39 @@
 import argparse
-from tf_reader import TFReaderWin
+import sys
+import time
+
+
+#Modules whose import shows up in the startup time
+HEAVY_MODULES = ('numpy', 'pandas', 'matplotlib', 'cv2', 'tbparse', 'tensorflow', 'tkinter')
+
+
+#Startup breakdown printed by --profile-startup; every stage reports its wall time and the heavy modules it imported
+class StartupProfile:
+
+    def __init__(self, enabled):
+
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.seen = set(module for module in HEAVY_MODULES if module in sys.modules)
+
+    #Ends the current stage
+    def stage(self, name):
+
+        if not self.enabled:
+            return
+
+        now = time.perf_counter()
+        imported = [module for module in HEAVY_MODULES if module in sys.modules and module not in self.seen]
+        self.seen.update(imported)
+
+        print(f"{name:<24}{(now - self.last) * 1000:8.1f} ms   {', '.join(imported)}")
+        self.last = now
+
+    def total(self):
+
+        if self.enabled:
+            print(f"{'total':<24}{(time.perf_counter() - self.start) * 1000:8.1f} ms")
 
 
 if __name__ == "__main__":
@@ -7,14 +41,42 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Process a file")
     parser.add_argument("filename", help="trainings directory")
+    parser.add_argument("--max-samples", type=int, default=0, help="max points kept per tag when loading, reservoir sampled (0 = all)")
+    parser.add_argument("--precompute", action="store_true", help="compute the per tag summaries of every session, without opening the GUI")
+    parser.add_argument("--profile-startup", action="store_true", help="print the time spent in each startup stage and the heavy modules it imported")
     args = parser.parse_args()
-  
+
+    profile = StartupProfile(args.profile_startup)
+
+    from sessionloader import SessionLoader, shutdown_pool
+    profile.stage("import loader")
+
+    #Headless precompute stage; summaries are stored in the session index and used to rank sessions in Select Scalar
+    if args.precompute:
+
+        loader = SessionLoader(args.filename)
+        loader.parse_sessions()
+
+        for done, total in loader.precompute_summaries():
+            print(f"\rSummarizing sessions {done}/{total}", end="", flush=True)
+
+        print(f"\n{len(loader.sessions)} sessions summarized")
+        shutdown_pool()
+        raise SystemExit(0)
+
 
 
     filename = '../trainings'
 
-    reader = TFReaderWin(args.filename)
+    #The GUI is only imported when it is opened, so that the precompute stage runs headless
+    from tf_reader import TFReaderWin
+    profile.stage("import GUI")
+
+    reader = TFReaderWin(args.filename, max_samples = args.max_samples if args.max_samples > 0 else None)
+    profile.stage("create window")
 
-    while reader.running:       
+    #The window is shown once Tk gets idle
+    reader.after_idle(lambda: (profile.stage("first idle"), profile.total()))
 
-        reader.update_gui()
\ No newline at end of file
+    #Event driven; updates are scheduled with after() when something changes
+    reader.mainloop()
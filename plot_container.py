@@ -0,0 +1,420 @@
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+import random
+
+#Matplotlib plot utilities and tk wrapper
+#>this module is only imported when the first plot is added (see PlotHandler.add_plot), so matplotlib stays out of startup
+import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import matplotlib
+matplotlib.use("TkAgg")
+try:
+	from matplotlib.backends.backend_tkagg import NavigationToolbar2TkAgg
+except ImportError:
+	from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk as NavigationToolbar2TkAgg
+
+from loaded_scalar import LoadedScalar
+from smoothing import ema, smoothing_cache
+from decimation import minmax_decimate
+
+
+
+
+#================ TOOLBAR ===================
+# A custom class for NavigationToolbar2TkAgg; 
+# Adds the possibility to be resized to a smaller version with smaller icons
+class Toolbar(NavigationToolbar2TkAgg):
+
+	def __init__(self, plot, master, pack_toolbar = True, default = True):
+
+		#Initialize super class
+		super().__init__(plot, master, pack_toolbar = pack_toolbar)
+		
+		#Toolbar small icons paths
+		self.icon_names = ['./icons/home.gif', './icons/left_arrow.gif', './icons/right_arrow.gif', './icons/move.gif', './icons/zoom.gif',
+							'./icons/config.gif', './icons/save.gif']
+
+		#Default icons and size
+		self.default_icons = [widget.cget('image') for widget in self.winfo_children() if isinstance(widget, (tk.Button, tk.Checkbutton))]
+		self.default_hw = (self.winfo_children()[0].cget('height'), self.winfo_children()[0].cget('width'))
+
+		self.icons = []
+
+		#The coordinates label is removed and placed elsewhere
+		self._message_label.pack_forget()
+		self._load_icons()      
+
+	#Loads the small icons
+	def _load_icons(self):
+
+		for i, icon in enumerate(self.icon_names):
+			self.icons.append(tk.PhotoImage(file = icon))
+
+	#Changes the toolbar to its smaller version
+	def change_icons(self, default):
+
+		#Delete all existing buttons
+		self.place_forget()
+		i = 0
+		for widget in self.winfo_children():            
+
+			if isinstance(widget, (tk.Button, tk.Checkbutton)):               
+
+				#Create new buttons and checkbuttons according to the requested size
+				widget.config(height = self.default_hw[0] if default else 17, 
+								image = self.default_icons[i] if default else self.icons[i], 
+								width = self.default_hw[1] if default else 17)
+
+				if isinstance(widget, tk.Checkbutton):
+					widget.config(selectimage = self.default_icons[i] if default else self.icons[i])
+				i+=1
+
+		self.place(height = 50 if default else 30)
+
+
+#=============== PLOT CONTAINER ====================
+#Frame used to contain Matplotlibs tk wrapper; handles low level plot functions
+class PlotContainer(ttk.Frame):
+
+	#Debiased (zero-initialized) smoothing, as TensorBoard does; set from Preferences
+	debias = False
+
+	def __init__(self, container, scalar_choice, **args):
+
+		#Initialize frame and figure
+		tk.Frame.__init__(self, container, **args)
+		self.fig, self.ax = plt.subplots()  
+		self.ax.grid(True)   
+
+		#Initialize Matplotlib wrappers and place them
+		self.canvas = FigureCanvasTkAgg(self.fig, master = self)
+		self.canvas.draw()
+		self.canvas.get_tk_widget().pack(side=tk.BOTTOM)       
+		self.canvas._tkcanvas.pack(side=tk.TOP, expand =True)
+		self.title = ""       
+
+		self.tool_frame = tk.Frame(self)
+		self.toolbar = Toolbar(self.canvas, self.tool_frame)
+		self.toolbar.update()
+		self.tool_frame.pack(fill = tk.X)
+		self.coord = self.toolbar.message
+
+		self.scalar_choice = scalar_choice
+
+		#Line artists, full (smoothed) series and cached series bounds, keyed by (LoadedScalar, tag)
+		#>artists only hold the decimated series; it is decimated again for the visible range on zoom/pan
+		self.artists = {}
+		self.series = {}
+		self.bounds = {}
+		self.legend_handles = None
+		self.updating = False
+		self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+
+		#Blitting background, cached after every full draw, and currently highlighted lines
+		self.background = None
+		self.highlighted = []
+		self.canvas.mpl_connect('draw_event', self.on_draw)
+
+		#Store dark/light enough colors
+		self.matplot_colors = [color for key, color in mcolors.CSS4_COLORS.items() if self.is_dark_color(color)]
+		random.shuffle(self.matplot_colors) 
+
+
+	#Smooth function; implemented after the analog Tensorboard feature
+	#>vectorized EMA; NaN/inf carry the previous value forward (see smoothing.ema)
+	#>if the owning LoadedScalar and tag are given, the result goes through the shared smoothing cache
+	def smooth(self, scalars, weight, owner = None, tag = None):
+
+		if len(scalars) > 0:
+
+			if owner is not None:
+				return smoothing_cache.smooth(owner.data_version, tag, scalars, weight, PlotContainer.debias)
+
+			return ema(scalars, weight, PlotContainer.debias)
+
+		else:
+
+			return None
+
+	#Checks if a color's luminance is within the chosen threshold
+	def is_dark_color(self, color):
+
+		# Define a threshold luminance value to filter lighter colors
+		threshold_high = 0.7  
+		threshold_low = 0.3
+		
+		# Convert color to RGB
+		rgb = mcolors.to_rgba(color)[:3]
+		
+		# Calculate luminance (brightness) using the formula for relative luminance
+		luminance = 0.2126 * rgb[0] + 0.7152 * rgb[1] + 0.0722 * rgb[2]
+		
+		# Check if the color is darker than the threshold
+		return threshold_low < luminance < threshold_high
+
+
+	#Clears the plot
+	def clear(self):
+
+		#Clear plot and draw it
+		self.ax.clear()
+		self.ax.grid(True)
+		self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+		self.artists = {}
+		self.series = {}
+		self.bounds = {}
+		self.legend_handles = None
+		self.canvas.draw()
+
+		#Clear the lines associated to every LoadedScalar
+		for scalar in LoadedScalar.get_loaded_scalars():
+			scalar.clear_lines(self.scalar_choice)
+
+	#Removes the artist of a (scalar, tag) key
+	def remove_artist(self, key):
+
+		line = self.artists.pop(key)
+		line.remove()
+		self.series.pop(key, None)
+		self.bounds.pop(key, None)
+		self.legend_handles = None
+
+	#Removes every artist of a LoadedScalar; used when its label is removed
+	def remove_scalar(self, scalar):
+
+		for key in [key for key in self.artists if key[0] is scalar]:
+			self.remove_artist(key)
+
+	#Reduces a series to what the plot width can show (min/max per pixel column); x_range is the visible range
+	def decimate(self, x, y, x_range = None):
+
+		return minmax_decimate(x, y, max(int(self.ax.bbox.width), 100), x_range)
+
+	#Decimates every line again for the new visible range; called on zoom and pan
+	def on_xlim_changed(self, ax):
+
+		if self.updating:
+			return
+
+		x_range = ax.get_xlim()
+
+		for key, (x, y) in self.series.items():
+			self.artists[key].set_data(*self.decimate(x, y, x_range))
+
+	#Returns the line of a (scalar, tag) key with the new data; the artist is only created the first time
+	#>the full series is kept and the line gets its decimated version, over the whole x range
+	# since update_plot resets the limits
+	def set_line(self, key, x, y, **kwargs):
+
+		self.series[key] = (x, y)
+		x, y = self.decimate(x, y)
+
+		line = self.artists.get(key)
+
+		if line is None:
+
+			line, = self.ax.plot(x, y, **kwargs)
+			self.artists[key] = line
+			self.legend_handles = None
+
+		else:
+
+			line.set_data(x, y)
+
+		return line
+
+	#Returns the (min x, max x, min y, max y) bounds of a series
+	#>cached per key and recomputed only when the data, the smoothing weight or the debias flag change
+	def series_bounds(self, key, scalar, smooth_value, x, y):
+
+		token = (scalar.data_version, round(float(smooth_value), 3), PlotContainer.debias)
+		cached = self.bounds.get(key)
+
+		if cached is None or cached[0] != token:
+
+			cached = (token, (np.min(x), np.max(x), np.min(y), np.max(y)))
+			self.bounds[key] = cached
+
+		return cached[1]
+
+
+	#Updates the plot with the scalars data
+	#>artists are kept between calls, one per (LoadedScalar, tag), and only get new data;
+	# they are created or removed only when runs are added or deleted
+	def update_plot(self, smooth_value):
+
+		#Initialize plot limit array
+		limit_values = []
+
+		loaded_scalars = LoadedScalar.get_loaded_scalars()
+
+		#The cached background is stale once the lines change; it is taken again by the next draw
+		self.background = None
+
+		#Limits set here must not trigger a second decimation
+		self.updating = True
+
+		#Remove the artists of scalars that are not loaded anymore
+		for key in [key for key in self.artists if key[0] not in loaded_scalars]:
+			self.remove_artist(key)
+
+		#Handle multiple tags
+		if type(self.scalar_choice) == list:
+
+			choice = self.scalar_choice[0]
+
+		else:
+
+			choice = self.scalar_choice
+
+		#For every scalar associated to all the LoadedScalar
+		for k, scalar in enumerate(loaded_scalars):
+
+			matplot_color = self.matplot_colors[k]
+
+			used_colors = [scalar.color for scalar in loaded_scalars]
+
+			while matplot_color in used_colors:
+
+				matplot_color = random.choice(self.matplot_colors)
+			
+			#Load data; direct lookups in the per tag index
+			data = scalar.get_series(self.scalar_choice)
+
+			#Handle multiple tags
+			if type(data) == list:
+
+				style = ['-', '--', ':']
+				triple_lines = []
+
+				for j, series in enumerate(data):
+
+					key = (scalar, self.scalar_choice[j])
+					x = series.step
+					y = self.smooth(series.value, smooth_value, scalar, self.scalar_choice[j])
+
+					#Non-existent scalar or not valid data
+					if not type(y) == np.ndarray:
+
+						if key in self.artists:
+							self.remove_artist(key)
+
+						scalar.add_line(choice, None)
+						continue
+
+					limit_values.append(self.series_bounds(key, scalar, smooth_value, x, y))
+
+					#Draw line and store color for the first entry
+					if scalar.color == None:
+						scalar.color = matplot_color
+
+					triple_lines.append(self.set_line(key, x, y, linestyle = style[j], color = scalar.color))
+
+				scalar.add_line(choice, triple_lines)
+
+			else:
+
+				key = (scalar, choice)
+				x = data.step
+				y = self.smooth(data.value, smooth_value, scalar, choice)
+
+				#Non-existent scalar or not valid data
+				if not type(y) == np.ndarray:
+
+					if key in self.artists:
+						self.remove_artist(key)
+
+					scalar.add_line(choice, None)
+					continue
+
+				limit_values.append(self.series_bounds(key, scalar, smooth_value, x, y))
+			   
+				#Draw line and store color for the first entry
+				if scalar.color == None:
+					scalar.color = matplot_color
+
+				scalar.add_line(choice, self.set_line(key, x, y, color = scalar.color))
+
+			points = scalar.get_points()
+
+			if points is not None:
+
+				if 'Test' in choice:
+
+					x = points.step
+					if not type(x) == list:
+						continue
+					y = y[x]
+					scalar.add_line('[Point]', self.set_line((scalar, '[Point]'), x, y, marker = 'o', linestyle = 'None', color = scalar.color, markersize = 3))
+
+		#Legend of multiple tags plots; rebuilt only when artists were created
+		if type(self.scalar_choice) == list and self.legend_handles is None:
+
+			title = self.title.strip('(3)')
+			self.legend_handles = [line for key, line in self.artists.items() if key[1] != '[Point]'][:3]
+
+			if len(self.legend_handles) > 0:
+				self.ax.legend(handles = self.legend_handles, labels = [f'{title}- 1', f'{title}- 2', f'{title}- 3'][:len(self.legend_handles)], loc = 'upper left')
+
+		#Calculate plot limits and set them
+		if len(limit_values) > 0:
+
+			limit_values = np.array(limit_values)
+			min_x = np.min(limit_values[:,0])
+			max_x = np.max(limit_values[:,1])
+			min_y = np.min(limit_values[:,2])
+			max_y = np.max(limit_values[:,3])
+
+			self.ax.set_xlim(min_x-10, max_x+10)
+			self.ax.set_ylim(min_y-10, max_y+25)   
+
+		self.updating = False
+
+		#Set title and draw
+		self.ax.set_title(self.title)    
+		self.canvas.draw_idle()
+
+	#Fast update method; it only redraws the plot;
+	#>used when the scalars haven't changed but plot needs to be redrawn
+	def fast_update(self):
+
+		self.canvas.draw_idle()
+
+	#Caches the rendered plot as the blitting background
+	#>a draw made while lines are highlighted has them thick, so it cannot be used as background
+	def on_draw(self, event):
+
+		self.background = self.canvas.copy_from_bbox(self.fig.bbox) if len(self.highlighted) == 0 else None
+
+	#Highlights lines by blitting them thicker over the cached background; an empty list removes the highlight
+	#>without a valid background it falls back to a full (idle) redraw
+	def highlight(self, lines, linewidth = 3):
+
+		lines = [line for line in lines if line.axes is self.ax]
+
+		#Nothing highlighted before or after (e.g. labels left one after another); the canvas is already right
+		if len(lines) == 0 and len(self.highlighted) == 0:
+			return
+
+		for line in self.highlighted:
+			line.set_linewidth(1)
+
+		self.highlighted = lines
+
+		for line in self.highlighted:
+			line.set_linewidth(linewidth)
+
+		if self.background is None:
+
+			self.canvas.draw_idle()
+			return
+
+		self.canvas.restore_region(self.background)
+
+		for line in self.highlighted:
+			self.ax.draw_artist(line)
+
+		self.canvas.blit(self.fig.bbox)
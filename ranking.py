@@ -0,0 +1,191 @@
+import numpy as np
+
+
+#Score of runs without data for the ranked tag (or that never crossed the threshold)
+NO_DATA = -1000
+
+#Ranking metrics and their display names
+METRICS = {
+	'last': 'Last value',
+	'max': 'Max value',
+	'mean_last': 'Mean of last N',
+	'auc': 'Area under curve',
+	'threshold_step': 'Threshold crossing step',
+}
+
+#Per tag summary statistics stored for every session by the precompute stage
+SUMMARY_FIELDS = ('count', 'first_step', 'last_step', 'last', 'min', 'max', 'mean', 'auc')
+
+#Summary statistics a session can be ranked on
+SUMMARY_STATS = ('last', 'max', 'min', 'mean', 'auc')
+
+
+
+
+#Area under each segment of a concatenation of series (trapezoids over steps)
+#>trapezoid i joins points i and i+1; the ones joining two different series are zeroed
+def _segment_auc(steps, values, starts, ends):
+
+	area = np.append(np.diff(steps) * (values[1:] + values[:-1]) / 2, 0.0)
+	area[ends - 1] = 0.0
+	return np.add.reduceat(area, starts)
+
+
+
+
+#================ METRICS ====================
+#Computes a metric for many series in one pass: the series are concatenated and reduced per segment.
+#series is a list of ScalarSeries (None or empty series get NO_DATA)
+#>mean_last averages the last last_n values; auc integrates values over steps (trapezoids);
+# threshold_step is the first step whose value is >= threshold
+def compute_scores(series, metric = 'last', last_n = 10, threshold = 0.0):
+
+	lengths = np.array([len(s) if s is not None else 0 for s in series], dtype = np.int64)
+	scores = np.full(len(series), NO_DATA, dtype = np.float64)
+	valid = lengths > 0
+
+	if not np.any(valid):
+		return scores
+
+	values = np.concatenate([s.value for s, length in zip(series, lengths) if length > 0])
+	steps = np.concatenate([s.step for s, length in zip(series, lengths) if length > 0])
+	lengths = lengths[valid]
+	ends = np.cumsum(lengths)
+	starts = ends - lengths
+
+	if metric == 'last':
+
+		result = values[ends - 1]
+
+	elif metric == 'max':
+
+		result = np.fmax.reduceat(values, starts)
+
+	elif metric == 'mean_last':
+
+		#Sums over a mask of the last n values of each series, so a NaN or inf only affects its own series
+		n = np.minimum(lengths, max(int(last_n), 1))
+		in_tail = np.arange(len(values)) >= np.repeat(ends - n, lengths)
+		result = np.add.reduceat(np.where(in_tail, values, 0.0), starts) / n
+
+	elif metric == 'auc':
+
+		result = _segment_auc(steps.astype(np.float64), values, starts, ends)
+
+	elif metric == 'threshold_step':
+
+		hits = np.flatnonzero(values >= threshold)
+		first = np.searchsorted(hits, starts)
+		crossed = first < len(hits)
+		crossed[crossed] = hits[first[crossed]] < ends[crossed]
+
+		result = np.full(len(starts), NO_DATA, dtype = np.float64)
+		result[crossed] = steps[hits[first[crossed]]]
+
+	else:
+
+		raise ValueError(f'Unknown ranking metric {metric}')
+
+	scores[valid] = result
+	return scores
+
+#Summary statistics of every tag of decoded scalar columns (see ScalarCache), in one pass
+#>returns {tag: {field: value}} with the fields of SUMMARY_FIELDS
+def summarize_columns(columns):
+
+	if columns is None or len(columns['step']) == 0:
+		return {}
+
+	order = np.argsort(columns['codes'], kind = 'stable')
+	codes = columns['codes'][order]
+	steps = columns['step'][order]
+	values = columns['value'][order]
+
+	starts = np.flatnonzero(np.diff(codes, prepend = -1))
+	ends = np.append(starts[1:], len(codes))
+	counts = ends - starts
+
+	fields = {
+		'count': counts,
+		'first_step': steps[starts],
+		'last_step': steps[ends - 1],
+		'last': values[ends - 1],
+		'min': np.fmin.reduceat(values, starts),
+		'max': np.fmax.reduceat(values, starts),
+		'mean': np.add.reduceat(values, starts) / counts,
+		'auc': _segment_auc(steps.astype(np.float64), values, starts, ends),
+	}
+
+	summary = {}
+
+	for i, code in enumerate(codes[starts]):
+
+		summary[str(columns['tags'][code])] = {
+			field: int(fields[field][i]) if field in ('count', 'first_step', 'last_step') else float(fields[field][i])
+			for field in SUMMARY_FIELDS
+		}
+
+	return summary
+
+#Sort keys for scores, higher is better; an earlier threshold crossing is better, missing scores are worst
+def rank_keys(scores, metric = 'last'):
+
+	keys = np.where(np.isnan(scores), -np.inf, scores)
+
+	if metric == 'threshold_step':
+		keys = np.where(scores == NO_DATA, -np.inf, -scores)
+
+	return keys
+
+
+
+
+#================ RANKING ====================
+#Ranks the loaded runs on a metric of a tag; results are cached until the data or the settings change
+#>callers give a data version per series (see LoadedScalar.data_version), which identifies its content
+class Ranking:
+
+	def __init__(self, metric = 'last', last_n = 10, threshold = 0.0, max_entries = 32):
+
+		self.metric = metric
+		self.last_n = last_n
+		self.threshold = threshold
+		self.max_entries = max_entries
+		self.cache = {}
+
+	@property
+	def label(self):
+
+		return METRICS[self.metric]
+
+	#Scores of the given series
+	def scores(self, series, versions):
+
+		key = (self.metric, self.last_n, self.threshold, tuple(versions))
+		scores = self.cache.get(key)
+
+		if scores is None:
+
+			if len(self.cache) >= self.max_entries:
+				self.cache.clear()
+
+			scores = compute_scores(series, self.metric, self.last_n, self.threshold)
+			self.cache[key] = scores
+
+		return scores
+
+	#Indexes of the series, best first, and their scores
+	def order(self, series, versions):
+
+		scores = self.scores(series, versions)
+		return np.argsort(rank_keys(scores, self.metric))[::-1], scores
+
+	#Runs (see ScalarRun) ordered on the series of a tag choice (see ScalarRun.order_series), best first, with their scores
+	def rank(self, runs, order_choice = None):
+
+		series = [run.order_series(order_choice) for run in runs]
+		versions = [(run.data_version, order_choice) for run in runs]
+
+		indexes, scores = self.order(series, versions)
+
+		return [runs[i] for i in indexes], [scores[i] for i in indexes]
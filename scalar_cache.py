@@ -0,0 +1,200 @@
+import os
+import hashlib
+import threading
+import numpy as np
+
+from session_index import default_cache_dir, stat_key
+from tfrecord_reader import tag_filter
+
+
+#Default size bound for the cache folder
+DEFAULT_MAX_BYTES = 1024**3
+
+
+
+
+#================ SCALAR CACHE ====================
+#On-disk cache of decoded scalars, one columnar .npz file per events file.
+#Entries are keyed by the events file path and validated against its size and mtime;
+#the folder is kept under max_bytes by evicting the least recently used entries
+class ScalarCache:
+
+	def __init__(self, cache_dir = None, max_bytes = DEFAULT_MAX_BYTES):
+
+		self.cache_dir = cache_dir if cache_dir is not None else os.path.join(default_cache_dir(), 'scalars')
+		self.max_bytes = max_bytes
+		os.makedirs(self.cache_dir, exist_ok = True)
+
+	#Cache file for an events file
+	def entry_path(self, tf_events_path):
+
+		digest = hashlib.sha1(os.path.abspath(tf_events_path).encode()).hexdigest()
+		return os.path.join(self.cache_dir, f'{digest}.npz')
+
+	#Returns the cached scalar columns, or None if missing or stale
+	#>tags restricts the result to a tag selection (see tfrecord_reader.tag_filter)
+	#>max_samples is the per tag sample budget the entry must have been decoded with (None for every row)
+	def get_columns(self, tf_events_path, tags = None, max_samples = None):
+
+		entry = self.entry_path(tf_events_path)
+		key = stat_key(tf_events_path)
+
+		if key is None or not os.path.exists(entry):
+			return None
+
+		try:
+
+			with np.load(entry, allow_pickle = False) as data:
+
+				if tuple(data['fingerprint']) != key or self.entry_samples(data) != (max_samples or 0):
+					return None
+
+				columns = self.select_tags({name: data[name] for name in data.files}, tags)
+
+		except Exception:
+			return None
+
+		#Mark as recently used; entry mtime is the LRU clock
+		try:
+			os.utime(entry)
+		except OSError:
+			pass
+
+		return columns
+
+	#Returns the tags stored for an events file, or None if missing or stale; only the tag dictionary is read
+	def get_tags(self, tf_events_path):
+
+		entry = self.entry_path(tf_events_path)
+		key = stat_key(tf_events_path)
+
+		if key is None or not os.path.exists(entry):
+			return None
+
+		try:
+
+			with np.load(entry, allow_pickle = False) as data:
+
+				if tuple(data['fingerprint']) != key:
+					return None
+
+				return [str(tag) for tag in data['tags']]
+
+		except Exception:
+			return None
+
+	#Stores the scalar columns decoded from an events file
+	#>key must be the events file stat taken before decoding, so that appends made in the meantime invalidate the entry
+	#>max_samples is the per tag sample budget used while decoding, if any
+	def put(self, tf_events_path, columns, key, max_samples = None):
+
+		if key is None:
+			return
+
+		entry = self.entry_path(tf_events_path)
+		columns = dict(columns)
+		columns['fingerprint'] = np.array(key, dtype = np.int64)
+		columns['max_samples'] = np.array(max_samples or 0, dtype = np.int64)
+
+		#Write to a temporary file and swap it in, so concurrent readers never see half an entry
+		#>the name is unique per process and thread, as several of them may store the same entry
+		tmp_path = f'{entry}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+		try:
+
+			with open(tmp_path, 'wb') as f:
+				np.savez(f, **columns)
+
+			os.replace(tmp_path, entry)
+
+		except OSError:
+
+			if os.path.exists(tmp_path):
+				os.remove(tmp_path)
+
+	#Per tag sample budget of an entry; 0 if every row was kept
+	@staticmethod
+	def entry_samples(data):
+
+		return int(data['max_samples']) if 'max_samples' in data else 0
+
+	#Removes least recently used entries until the folder fits in max_bytes
+	def evict(self):
+
+		entries = []
+		total = 0
+
+		for entry in os.scandir(self.cache_dir):
+
+			if not entry.name.endswith('.npz'):
+				continue
+
+			try:
+				st = entry.stat()
+			except OSError:
+				continue
+
+			entries.append((st.st_mtime_ns, st.st_size, entry.path))
+			total += st.st_size
+
+		entries.sort()
+
+		for _, size, path in entries:
+
+			if total <= self.max_bytes:
+				break
+
+			try:
+				os.remove(path)
+				total -= size
+			except OSError:
+				pass
+
+	#Splits a tbparse scalars DataFrame into columnar arrays; tags are dictionary encoded
+	@staticmethod
+	def frame_to_columns(scalars):
+
+		import pandas as pd
+
+		codes, tags = pd.factorize(scalars['tag'])
+
+		columns = {
+			'tags': np.asarray(tags, dtype = str),
+			'codes': codes.astype(np.int32),
+			'step': scalars['step'].to_numpy(dtype = np.int64),
+			'value': scalars['value'].to_numpy(dtype = np.float64),
+		}
+
+		if 'wall_time' in scalars.keys():
+			columns['wall_time'] = scalars['wall_time'].to_numpy(dtype = np.float64)
+
+		return columns
+
+	#Keeps only the rows whose tag belongs to the selection; codes are remapped to the reduced dictionary
+	@staticmethod
+	def select_tags(columns, tags):
+
+		predicate = tag_filter(tags)
+
+		if predicate is None:
+			return columns
+
+		keep = np.array([predicate(str(tag)) for tag in columns['tags']], dtype = bool)
+		remap = np.cumsum(keep, dtype = np.int32) - 1
+		codes = columns['codes']
+		rows = keep[codes] if len(codes) > 0 else np.zeros(0, dtype = bool)
+
+		selected = {
+			'tags': columns['tags'][keep],
+			'codes': remap[codes[rows]] if len(codes) > 0 else codes,
+			'step': columns['step'][rows],
+			'value': columns['value'][rows],
+		}
+
+		if 'wall_time' in columns:
+			selected['wall_time'] = columns['wall_time'][rows]
+
+		if 'offset' in columns:
+			selected['offset'] = columns['offset']
+
+		return selected
@@ -0,0 +1,197 @@
+import numpy as np
+from tfrecord_reader import Reservoir
+
+
+#================ SCALAR SERIES ====================
+#Steps and values of a single tag, as two contiguous arrays
+class ScalarSeries:
+
+	__slots__ = ('step', 'value')
+
+	def __init__(self, step = None, value = None):
+
+		self.step = np.ascontiguousarray(step if step is not None else [], dtype = np.int64)
+		self.value = np.ascontiguousarray(value if value is not None else [], dtype = np.float64)
+
+	def __len__(self):
+
+		return len(self.step)
+
+	@property
+	def nbytes(self):
+
+		return self.step.nbytes + self.value.nbytes
+
+	#Value at the last step, or None for an empty series
+	@property
+	def last_value(self):
+
+		return self.value[-1] if len(self.value) > 0 else None
+
+	#Appends the rows past the last step; returns the number of rows added
+	def extend(self, other):
+
+		if len(self) > 0:
+			keep = other.step > self.step[-1]
+			step, value = other.step[keep], other.value[keep]
+		else:
+			step, value = other.step, other.value
+
+		if len(step) > 0:
+			self.step = np.concatenate([self.step, step])
+			self.value = np.concatenate([self.value, value])
+
+		return len(step)
+
+
+
+
+#================ SCALAR DATA ====================
+#Compact storage of a run's scalars: a tag dictionary (tag -> code) and one ScalarSeries per code.
+#Replaces the tbparse DataFrame, whose tag column holds one Python string per row;
+#decoded columns are grouped by tag once, so getting the series of a tag is a dict lookup.
+#>the tags the viewer looks up on every redraw (points and default ordering) are found once, as tags are added
+class ScalarData:
+
+	__slots__ = ('tags', 'codes', 'series', 'point_tag', 'order_tag', 'reservoirs')
+
+	def __init__(self):
+
+		self.tags = []
+		self.codes = {}
+		self.series = []
+
+		#First '[Point]' tag, and first test average tag (default label ordering)
+		self.point_tag = None
+		self.order_tag = None
+
+		#(budget, reservoir) of the tags whose appended rows are sampled (see extend)
+		self.reservoirs = {}
+
+	#Groups scalar columns (see ScalarCache for the layout) by tag; rows keep their order inside a tag
+	#>tags are added in code order, the decoders give codes in alphabetical or first appearance order
+	@classmethod
+	def from_columns(cls, columns):
+
+		data = cls()
+
+		if columns is None or len(columns['step']) == 0:
+			return data
+
+		codes = columns['codes']
+		step = columns['step']
+		value = columns['value']
+
+		#Decoded and cached columns are already grouped by tag
+		if np.any(codes[1:] < codes[:-1]):
+
+			order = np.argsort(codes, kind = 'stable')
+			codes, step, value = codes[order], step[order], value[order]
+
+		bounds = np.searchsorted(codes, np.arange(len(columns['tags']) + 1))
+
+		for code, tag in enumerate(columns['tags']):
+
+			if bounds[code+1] > bounds[code]:
+				data.add(str(tag), ScalarSeries(step[bounds[code]:bounds[code+1]], value[bounds[code]:bounds[code+1]]))
+
+		return data
+
+	def __contains__(self, tag):
+
+		return tag in self.codes
+
+	def __len__(self):
+
+		return sum(len(series) for series in self.series)
+
+	@property
+	def nbytes(self):
+
+		return sum(series.nbytes for series in self.series)
+
+	#Series of a tag, or None if the tag is not loaded
+	def get(self, tag):
+
+		code = self.codes.get(tag)
+		return self.series[code] if code is not None else None
+
+	#Adds the series of a new tag; a tag already present is left as it is
+	def add(self, tag, series):
+
+		if tag in self.codes:
+			return
+
+		self.codes[tag] = len(self.tags)
+		self.tags.append(tag)
+		self.series.append(series)
+
+		if self.point_tag is None and '[Point]' in tag:
+			self.point_tag = tag
+
+		if self.order_tag is None and "Avg" in tag and "Network" in tag and "Test" in tag and not "Best" in tag:
+			self.order_tag = tag
+
+	#Adds the tags of another ScalarData that are not present yet
+	def merge(self, other):
+
+		for tag, series in zip(other.tags, other.series):
+			self.add(tag, series)
+
+	#Appends newer rows of another ScalarData (live tailing); rows not past the last known step of their tag are skipped
+	#>tags restricts the tags extended (None for all of them); returns the number of rows added
+	#>max_samples keeps every series within the per tag sample budget of the load (see _extend_sampled)
+	def extend(self, other, tags = None, max_samples = None):
+
+		added = 0
+
+		for tag, series in zip(other.tags, other.series):
+
+			if tags is not None and tag not in tags:
+				continue
+
+			if tag not in self.codes:
+				self.add(tag, ScalarSeries())
+
+			current = self.get(tag)
+
+			if max_samples:
+				added += self._extend_sampled(tag, current, series, max_samples)
+			else:
+				added += current.extend(series)
+
+		return added
+
+	#Appends rows through a reservoir once a series reaches the sample budget, as tfrecord_reader.Reservoir does while decoding
+	#>the reservoir starts from the rows in memory and counts them as every row seen so far,
+	# so appended rows are kept a bit more often than rows of a capped load
+	#>rows in memory over the budget (loaded with a larger one, or before it was lowered) are sampled down first;
+	# a reservoir made for another budget is started again the same way
+	def _extend_sampled(self, tag, current, series, max_samples):
+
+		keep = series.step > current.step[-1] if len(current) > 0 else np.ones(len(series), dtype = bool)
+
+		if not np.any(keep):
+			return 0
+
+		budget, reservoir = self.reservoirs.get(tag, (None, None))
+
+		if budget != max_samples:
+
+			if len(current) + len(series) <= max_samples:
+				self.reservoirs.pop(tag, None)
+				return current.extend(series)
+
+			reservoir = Reservoir(max_samples)
+			self.reservoirs[tag] = (max_samples, reservoir)
+
+			for row in zip(current.step.tolist(), current.value.tolist()):
+				reservoir.add(row)
+
+		for row in zip(series.step[keep].tolist(), series.value[keep].tolist()):
+			reservoir.add(row)
+
+		current.step = np.array([step for step, _ in reservoir.items], dtype = np.int64)
+		current.value = np.array([value for _, value in reservoir.items], dtype = np.float64)
+
+		return int(np.count_nonzero(keep))
@@ -0,0 +1,114 @@
+import itertools
+from smoothing import smoothing_cache
+from scalar_data import ScalarData, ScalarSeries
+
+
+#====================SCALAR RUN====================
+#The data of a loaded run, without any GUI: its scalars, training parameters, name and session.
+#Usable as is from scripts and notebooks (see SessionLoader.load_runs); LoadedScalar adds the label and plotted lines.
+class ScalarRun:
+
+	#Source of data versions; every change of a run's data gets a new one
+	versions = itertools.count()
+
+	def __init__(self, scalar, params, scalar_name, session = None, available_tags = None):
+
+		#Initialize attributes
+		#>with tag-selective loading scalar only holds some tags; available_tags lists every tag of the run
+		#>scalar holds the decoded columns (see ScalarCache), None if the events file could not be read;
+		# they are only kept in the compact per tag form of ScalarData
+		#>offset is the events file byte offset decoded so far (None if unknown), used by live tailing
+		self.offset = int(scalar['offset']) if scalar is not None and 'offset' in scalar else None
+		self.scalar = ScalarData.from_columns(scalar)
+		self.session = session
+		self.loaded_tags = set(self.scalar.tags)
+		self.available_tags = list(available_tags) if available_tags is not None else sorted(self.loaded_tags)
+		self.data_version = next(ScalarRun.versions)
+		self.params = params
+		self.scalar_name = scalar_name
+
+	#Marks the data as changed; smoothed series computed on the old data are dropped
+	def data_changed(self):
+
+		smoothing_cache.discard(self.data_version)
+		self.data_version = next(ScalarRun.versions)
+
+	#Drops the smoothed series of the run from the shared cache
+	def release(self):
+
+		smoothing_cache.discard(self.data_version)
+
+	#Tags of the run that are not loaded yet
+	def missing_tags(self, tags):
+
+		return [tag for tag in tags if tag in self.available_tags and tag not in self.loaded_tags]
+
+	#Merges newly loaded tags into the scalar data; tags already loaded are ignored
+	def add_scalars(self, scalar):
+
+		if scalar is None or len(scalar['step']) == 0:
+			return
+
+		self.scalar.merge(ScalarData.from_columns(scalar))
+		self.loaded_tags.update(self.scalar.tags)
+		self.data_changed()
+
+	#Appends scalars written after the initial load (live tailing)
+	#>rows of tags that were not loaded are dropped, brand new tags are kept;
+	# rows not past the last step already known for their tag are skipped as duplicates
+	#>max_samples applies the load's per tag sample budget to the appended rows (None keeps every row)
+	def extend_scalars(self, scalar, max_samples = None):
+
+		appended = ScalarData.from_columns(scalar)
+
+		if len(appended.tags) == 0:
+			return
+
+		new_tags = [tag for tag in appended.tags if tag not in self.available_tags]
+		self.available_tags.extend(new_tags)
+		self.loaded_tags.update(new_tags)
+
+		if self.scalar.extend(appended, self.loaded_tags, max_samples) == 0:
+			return
+
+		self.data_changed()
+
+	#Series of the chosen tag, or list of series for multiple tags; tags that are not loaded give an empty series
+	def get_series(self, scalar_choice):
+
+		if type(scalar_choice) == list:
+
+			return [self.scalar.get(tag) or ScalarSeries() for tag in scalar_choice]
+
+		return self.scalar.get(scalar_choice) or ScalarSeries()
+
+	#Series of the '[Point]' tag, if any
+	def get_points(self):
+
+		return self.scalar.get(self.scalar.point_tag) if self.scalar.point_tag is not None else None
+
+	#Smoothed values of a tag (see smoothing.ema); cached until the data changes
+	def smoothed(self, tag, weight, debias = False):
+
+		series = self.get_series(tag)
+		return smoothing_cache.smooth(self.data_version, tag, series.value, weight, debias) if len(series) > 0 else series.value
+
+	#Series the run is ranked on for a tag choice (order_choice); None if the tag has no data
+	# >the default is the test average, thought for plots of average values
+	#>could be missing for a training never finished
+	def order_series(self, order_choice):
+
+		if order_choice == None:
+
+			key = self.scalar.order_tag
+
+		elif '(3)' in order_choice:
+
+			new_key = order_choice.strip(' (3)')
+			key = [(new_key + f' - {i}:') for i in range(1,4)][0]
+
+		else:
+
+			key = order_choice
+
+		return self.scalar.get(key) if key is not None else None
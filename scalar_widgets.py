@@ -1,302 +1,18 @@
 import tkinter as tk
 from tkinter import ttk
+#Dialogs are submodules; they used to be loaded as a side effect of importing matplotlib's Tk backend
+import tkinter.messagebox
+import tkinter.filedialog
 
 import numpy as np
 import os
 import copy
 import re
-import random
-
-#Matplotlib plot utilities and tk wrapper
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_agg import FigureCanvasAgg
-import matplotlib
-matplotlib.use("TkAgg")
-try:
-	from matplotlib.backends.backend_tkagg import NavigationToolbar2TkAgg
-except ImportError:
-	from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk as NavigationToolbar2TkAgg
 
 from loaded_scalar import LoadedScalar
 
-import cv2
 
 
-#================ TOOLBAR ===================
-# A custom class for NavigationToolbar2TkAgg; 
-# Adds the possibility to be resized to a smaller version with smaller icons
-class Toolbar(NavigationToolbar2TkAgg):
-
-	def __init__(self, plot, master, pack_toolbar = True, default = True):
-
-		#Initialize super class
-		super().__init__(plot, master, pack_toolbar = pack_toolbar)
-		
-		#Toolbar small icons paths
-		self.icon_names = ['./icons/home.gif', './icons/left_arrow.gif', './icons/right_arrow.gif', './icons/move.gif', './icons/zoom.gif',
-							'./icons/config.gif', './icons/save.gif']
-
-		#Default icons and size
-		self.default_icons = [widget.cget('image') for widget in self.winfo_children() if isinstance(widget, (tk.Button, tk.Checkbutton))]
-		self.default_hw = (self.winfo_children()[0].cget('height'), self.winfo_children()[0].cget('width'))
-
-		self.icons = []
-
-		#The coordinates label is removed and placed elsewhere
-		self._message_label.pack_forget()
-		self._load_icons()      
-
-	#Loads the small icons
-	def _load_icons(self):
-
-		for i, icon in enumerate(self.icon_names):
-			self.icons.append(tk.PhotoImage(file = icon))
-
-	#Changes the toolbar to its smaller version
-	def change_icons(self, default):
-
-		#Delete all existing buttons
-		self.place_forget()
-		i = 0
-		for widget in self.winfo_children():            
-
-			if isinstance(widget, (tk.Button, tk.Checkbutton)):               
-
-				#Create new buttons and checkbuttons according to the requested size
-				widget.config(height = self.default_hw[0] if default else 17, 
-								image = self.default_icons[i] if default else self.icons[i], 
-								width = self.default_hw[1] if default else 17)
-
-				if isinstance(widget, tk.Checkbutton):
-					widget.config(selectimage = self.default_icons[i] if default else self.icons[i])
-				i+=1
-
-		self.place(height = 50 if default else 30)
-
-
-#=============== PLOT CONTAINER ====================
-#Frame used to contain Matplotlibs tk wrapper; handles low level plot functions
-class PlotContainer(ttk.Frame):
-
-	def __init__(self, container, scalar_choice, **args):
-
-		#Initialize frame and figure
-		tk.Frame.__init__(self, container, **args)
-		self.fig, self.ax = plt.subplots()  
-		self.ax.grid(True)   
-
-		#Initialize Matplotlib wrappers and place them
-		self.canvas = FigureCanvasTkAgg(self.fig, master = self)
-		self.canvas.draw()
-		self.canvas.get_tk_widget().pack(side=tk.BOTTOM)       
-		self.canvas._tkcanvas.pack(side=tk.TOP, expand =True)
-		self.title = ""       
-
-		self.tool_frame = tk.Frame(self)
-		self.toolbar = Toolbar(self.canvas, self.tool_frame)
-		self.toolbar.update()
-		self.tool_frame.pack(fill = tk.X)
-		self.coord = self.toolbar.message
-
-		self.scalar_choice = scalar_choice
-
-		#Store dark/light enough colors
-		self.matplot_colors = [color for key, color in mcolors.CSS4_COLORS.items() if self.is_dark_color(color)]
-		random.shuffle(self.matplot_colors) 
-
-
-	#Smooth function; implemented after the analog Tensorboard feature
-	def smooth(self, scalars, weight):
-		#check for NaNs and bad scalars
-		if len(scalars) > 0:
-
-			last = scalars[0] if np.isfinite(scalars[0]) else 0.0
-			smoothed = np.convolve(np.ones(len(scalars)), scalars, mode='same') / len(scalars)
-			smoothed[0] = last
-			for i in range(1, len(scalars)):
-				#smooth if not NaN; else use last value
-				if not np.isfinite(scalars[i]):
-					smoothed[i] = smoothed[i-1]
-				else:
-					smoothed[i] = last * weight + (1 - weight) * scalars[i]
-					last = smoothed[i]
-			return smoothed
-
-		else:
-
-			return None
-
-	#Checks if a color's luminance is within the chosen threshold
-	def is_dark_color(self, color):
-
-		# Define a threshold luminance value to filter lighter colors
-		threshold_high = 0.7  
-		threshold_low = 0.3
-		
-		# Convert color to RGB
-		rgb = mcolors.to_rgba(color)[:3]
-		
-		# Calculate luminance (brightness) using the formula for relative luminance
-		luminance = 0.2126 * rgb[0] + 0.7152 * rgb[1] + 0.0722 * rgb[2]
-		
-		# Check if the color is darker than the threshold
-		return threshold_low < luminance < threshold_high
-
-
-	#Clears the plot
-	def clear(self):
-
-		#Clear plot and draw it
-		self.ax.clear()
-		self.canvas.draw()
-
-		#Clear the lines associated to every LoadedScalar
-		for scalar in LoadedScalar.get_loaded_scalars():
-			scalar.clear_lines(self.scalar_choice)
-
-
-	#Updates the plot with the scalars data
-	def update_plot(self, smooth_value):
-
-		#Initialize plot limit array
-		limit_values = []
-
-		#Clear plot and reset plot relative arrays
-		self.ax.clear()     
-
-		#For every scalar associated to all the LoadedScalar
-		for k, scalar in enumerate(LoadedScalar.get_loaded_scalars()):
-
-			matplot_color = self.matplot_colors[k]
-
-			used_colors = [scalar.color for scalar in LoadedScalar.get_loaded_scalars()]
-
-			while matplot_color in used_colors:
-
-				matplot_color = random.choice(self.matplot_colors)
-			
-			#Load data
-			scalar.update_data_dict(self.scalar_choice)
-
-			#Handle multiple tags
-			if type(self.scalar_choice) == list:
-
-				choice = self.scalar_choice[0]
-
-			else:
-
-				choice = self.scalar_choice
-
-			#Calculate x and y, and plot
-			if choice in scalar.data.keys():
-
-				#Handle multiple tags
-				if type(scalar.data[choice]) == list:
-
-					style = ['-', '--', ':']
-					title = self.title.strip('(3)')
-					triple_lines = []
-
-					for j, data in enumerate(scalar.data[choice]):
-
-						x = data['step']
-						y = self.smooth(data['value'].values, smooth_value)
-
-						#Non-existent scalar or not valid data
-						if not type(y) == np.ndarray:
-
-							scalar.add_line(choice, None)
-							continue
-
-						p, q, r, s = np.min(x), np.max(x), np.min(y), np.max(y)
-						limit_values.append([p, q, r, s])
-
-						if scalar.color == None:
-
-							#Draw line and store color for the first entry
-							tmp, = self.ax.plot(x, y, linestyle=style[j], color = matplot_color)
-							scalar.color = matplot_color
-
-
-						else:
-
-							#Draw line
-							tmp, = self.ax.plot(x, y, linestyle=style[j], color = scalar.color)
-
-						triple_lines.append(tmp)
-
-					#Add legend to plot
-					self.ax.legend(labels=[f'{title}- 1', f'{title}- 2', f'{title}- 3'], loc='upper left')
-					scalar.add_line(choice, triple_lines)
-
-				else:
-
-					x = scalar.data[choice]['step']
-					y = self.smooth(scalar.data[choice]['value'].values, smooth_value)
-
-					#Non-existent scalar or not valid data
-					if not type(y) == np.ndarray:
-
-						scalar.add_line(choice, None)
-						continue
-
-					p, q,  r, s = np.min(x), np.max(x), np.min(y), np.max(y)
-					limit_values.append([p, q, r, s])
-				   
-					#Draw line and store color
-					if scalar.color == None:
-
-							#Draw line and store color for the first entry
-							tmp, = self.ax.plot(x, y, color = matplot_color)
-							scalar.color = matplot_color
-
-					else:
-
-						#Draw line
-						tmp, = self.ax.plot(x, y, color = scalar.color)
-			
-					scalar.add_line(choice, tmp)
-
-			#The scalar has no valid data
-			else:
-
-				scalar.add_line(choice, None)
-
-			if "[Point]" in scalar.data.keys():
-
-				if 'Test' in choice:
-
-					x = scalar.data['[Point]']['step']
-					if not type(x) == list:
-						continue
-					y = y[x]
-					tmp, = self.ax.plot(x, y, 'o', color = scalar.color, markersize = 3)
-					scalar.add_line('[Point]', tmp)
-
-
-		#Calculate plot limits
-		limit_values = np.array(limit_values)
-		min_x = np.min(limit_values[:,0])
-		max_x = np.max(limit_values[:,1])
-		min_y = np.min(limit_values[:,2])
-		max_y = np.max(limit_values[:,3])
-
-		#Set plot limits, title and grid and draw
-		self.ax.set_xlim(min_x-10, max_x+10)
-		self.ax.set_ylim(min_y-10, max_y+25)   
-		self.ax.grid(True) 
-		self.ax.set_title(self.title)    
-		self.canvas.draw()
-
-	#Fast update method; it only redraws the plot;
-	#>used when the scalars haven't changed but plot needs to be redrawn
-	def fast_update(self):
-
-		self.canvas.draw()
-
 
 #===================== SCROLLABLE FRAME ===============
 #Frame with scrollbar
@@ -333,6 +49,67 @@ class ScrollableFrame(ttk.Frame):
 
 
 
+#================ REDRAW SCHEDULER ===================
+#Coalesces redraw requests coming from the slider, resizing and hovering.
+#Requests are named tasks (a newer request replaces a pending one with the same name) and dirty plots;
+#everything pending is run together at most once per frame budget, and plots are drawn with draw_idle
+class RedrawScheduler:
+
+	def __init__(self, widget, budget = 33):
+
+		self.widget = widget
+		self.budget = budget
+		self.pending = None
+		self.tasks = {}
+		self.dirty = []
+
+	#Requests a task for the next frame
+	def request(self, name, function):
+
+		self.tasks[name] = function
+		self.schedule()
+
+	#Marks a plot to be drawn in the next frame
+	def mark_dirty(self, plot):
+
+		if plot not in self.dirty:
+			self.dirty.append(plot)
+
+		self.schedule()
+
+	def schedule(self):
+
+		if self.pending is None:
+			self.pending = self.widget.after(self.budget, self.flush)
+
+	#Runs the pending tasks, then draws the dirty plots
+	def flush(self):
+
+		self.pending = None
+		tasks, self.tasks = self.tasks, {}
+		dirty, self.dirty = self.dirty, []
+
+		for function in tasks.values():
+			function()
+
+		for plot in dirty:
+
+			if plot.winfo_exists():
+				plot.fast_update()
+
+	#Drops every pending request
+	def cancel(self):
+
+		if self.pending is not None:
+			self.widget.after_cancel(self.pending)
+
+		self.pending = None
+		self.tasks = {}
+		self.dirty = []
+
+
+
+
 #====================PLOT HANDLER====================
 #Class capable of handling multiple instances of PlotContainer
 #Chooses from the loaded scalars the correct tags
@@ -386,6 +163,13 @@ class PlotHandler(ttk.Frame):
 		#Variable used to trigger root update
 		self.need_to_update = False
 
+		#Debiased smoothing flag; given to PlotContainer once the plot widgets are imported
+		self.debias_value = False
+
+		#Coalesces slider, resize and hover redraws
+		self.scheduler = RedrawScheduler(self)
+		self.smooth_value = 0.0
+
 
 
 	#Self explainatory
@@ -430,7 +214,38 @@ class PlotHandler(ttk.Frame):
 			return (width, height)
 
 
+	#Debiased smoothing flag, shared by every plot
+	@property
+	def debias(self):
+		return self.debias_value
+
+	@debias.setter
+	def debias(self, value):
+
+		self.debias_value = value
+
+		if len(self.plots) > 0:
+
+			from plot_container import PlotContainer
+			PlotContainer.debias = value
+
+	#Removes the lines of a LoadedScalar from every plot and redraws
+	def remove_scalar(self, scalar):
+
+		for plot in self.plots:
+
+			plot.remove_scalar(scalar)
+
+		self.fast_update()
+
+	#Requests a plots update for the next frame; bursts of requests (slider drags) end in a single update
+	def request_update(self, smooth_value):
+
+		self.smooth_value = smooth_value
+		self.scheduler.request('update', lambda: self.update_plots(self.smooth_value))
+
 	#Calls the update function for every plot
+	#>the line dicts of the scalars only hold references, they are refilled by the plots
 	def update_plots(self, smooth_value):
 
 		for scalar in LoadedScalar.get_loaded_scalars():
@@ -464,6 +279,10 @@ class PlotHandler(ttk.Frame):
 		#Initialize frame (container), plot, remove button, and coordinates label and place them in the frame
 		new_frame = ttk.Frame(self)
 
+		#The plot widgets (and matplotlib) are imported with the first plot
+		from plot_container import PlotContainer
+		PlotContainer.debias = self.debias_value
+
 		new_plot = PlotContainer(new_frame, self.get_tag_choice)
 		new_plot.title = self.scalar_choice.get()
 		new_plot.grid(row = 0, column = 0)
@@ -478,11 +297,15 @@ class PlotHandler(ttk.Frame):
 		self.plots.append(new_plot)
 		self.labels.append(new_label)
 
+		#Load the plotted tag(s) for scalars that were loaded without them
+		self.master.ensure_tags(new_plot.scalar_choice)
+
 		#Update
 		self.update_sizes()
 		self.update_grid()
 		self.update_plots(0.0)
 		self.need_to_update = True
+		self.master.request_gui_update()
 
 		self.remove_plots_button.state(["!disabled"])
 
@@ -526,6 +349,7 @@ class PlotHandler(ttk.Frame):
 	#Remove plots
 	def remove_plot(self, rm_plot):
 
+		import matplotlib.pyplot as plt
 
 		for i, plot in enumerate(self.plots):
 
@@ -544,6 +368,7 @@ class PlotHandler(ttk.Frame):
 		self.update_sizes()
 		self.update_grid()
 		self.need_to_update = True
+		self.master.request_gui_update()
 		self.add_butt.state(["!disabled"])
 
 		if len(self.plots) == 0:
@@ -556,10 +381,14 @@ class PlotHandler(ttk.Frame):
 			plot.clear()
 
 	#Resize function; adjusts plot size according to the window size
+	#>the widgets are resized once per frame by the scheduler, whatever the number of <Configure> events
 	def on_resize(self, win_size):
 
-		self.update()        
 		self.root_size = win_size       
+		self.scheduler.request('resize', self.resize_plots)
+
+	#Applies the current plot size to every plot
+	def resize_plots(self):
 
 		for plot in self.plots:
 			
@@ -589,6 +418,10 @@ class PlotHandler(ttk.Frame):
 	#Save all the displayed plots into a single image
 	def save_multiple_plots(self):
 
+		#Image export modules are only imported when saving
+		import cv2
+		from matplotlib.backends.backend_agg import FigureCanvasAgg
+
 		#copy the Figures to resize them beforehand (won't loose quality)
 		images = []
 		figs = [copy.deepcopy(plot.fig) for plot in self.plots]
@@ -637,13 +470,9 @@ class PlotHandler(ttk.Frame):
 		empty = np.zeros((final_image.shape[0], 300, 3), dtype=np.uint8)
 		empty[:,:,:] = (255, 255, 255)
 
-		loaded_scalars = LoadedScalar.get_loaded_scalars()
-		max_values = [scalar.get_max(self.master.order_choice) for scalar in LoadedScalar.get_loaded_scalars()]
-		indexes = np.argsort(max_values)[::-1]
-
-		for i, _ in enumerate(loaded_scalars):
+		loaded_scalars, _ = self.master.ranked_scalars()
 
-			scalar = loaded_scalars[indexes[i]]	
+		for i, scalar in enumerate(loaded_scalars):
 
 			if scalar.color == None:
 				continue
@@ -679,6 +508,10 @@ class PlotHandler(ttk.Frame):
 	#Save all the displayed plots into a single image
 	def save_multiple_plots_vertical(self):
 
+		#Image export modules are only imported when saving
+		import cv2
+		from matplotlib.backends.backend_agg import FigureCanvasAgg
+
 		#copy the Figures to resize them beforehand (won't loose quality)
 		images = []
 		figs = [copy.deepcopy(plot.fig) for plot in self.plots]
@@ -727,13 +560,9 @@ class PlotHandler(ttk.Frame):
 		empty = np.zeros((final_image.shape[0], 300, 3), dtype=np.uint8)
 		empty[:,:,:] = (255, 255, 255)
 
-		loaded_scalars = LoadedScalar.get_loaded_scalars()
-		max_values = [scalar.get_max(self.master.order_choice) for scalar in LoadedScalar.get_loaded_scalars()]
-		indexes = np.argsort(max_values)[::-1]
-
-		for i, _ in enumerate(loaded_scalars):
+		loaded_scalars, _ = self.master.ranked_scalars()
 
-			scalar = loaded_scalars[indexes[i]]	
+		for i, scalar in enumerate(loaded_scalars):
 
 			if scalar.color == None:
 				continue
@@ -837,12 +666,19 @@ class PlotHandler(ttk.Frame):
 		self.scalar_choice.set("")
 		self.option_menu["menu"].delete(0,"end")
 
-	#Redraws every plot
+	#Highlights lines in every plot (blitted)
+	def highlight(self, lines):
+
+		for plot in self.plots:
+
+			plot.highlight(lines)
+
+	#Redraws every plot; coalesced by the scheduler
 	def fast_update(self):
 
 		for plot in self.plots:
 
-			plot.canvas.draw()
+			self.scheduler.mark_dirty(plot)
   
 
 
@@ -0,0 +1,229 @@
+import os
+import json
+import pickle
+import sqlite3
+import hashlib
+import threading
+
+
+#Bump when the stored layout changes; older index files are rebuilt from scratch
+INDEX_VERSION = 4
+
+
+#Default location for on-disk caches; follows XDG when available
+def default_cache_dir():
+
+	base = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+	return os.path.join(base, 'tf_reader')
+
+
+#Cheap stat fingerprint; None if the path vanished
+def stat_key(path):
+
+	try:
+		st = os.stat(path)
+	except OSError:
+		return None
+
+	return (st.st_mtime_ns, st.st_size)
+
+
+
+
+#================ SESSION INDEX ====================
+#Persistent SQLite index of TrainingSession records for a trainings dir.
+#Tag folders are keyed by mtime, so their listing is only redone when a session is added or deleted;
+#sessions are keyed by path plus the stat of their folder and .params file, so only changed ones are re-parsed.
+#Per tag summaries of the events files (see ranking.summarize_columns) are keyed by the events file stat
+class SessionIndex:
+
+	def __init__(self, trainings_dir, cache_dir = None):
+
+		self.trainings_dir = os.path.abspath(trainings_dir)
+		self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+		os.makedirs(self.cache_dir, exist_ok = True)
+
+		#One database per trainings dir
+		digest = hashlib.sha1(self.trainings_dir.encode()).hexdigest()[:16]
+		self.db_path = os.path.join(self.cache_dir, f'sessions-{digest}.sqlite')
+
+		#The connection is shared by the loader threads; every query goes through the lock, file system calls do not
+		self.lock = threading.RLock()
+		self.conn = sqlite3.connect(self.db_path, check_same_thread = False)
+		self._init_schema()
+
+	#Creates tables; drops everything if the index was written by another version
+	def _init_schema(self):
+
+		cur = self.conn.cursor()
+		cur.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+		row = cur.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+
+		if row is None or int(row[0]) != INDEX_VERSION:
+
+			cur.execute("DROP TABLE IF EXISTS tag_dirs")
+			cur.execute("DROP TABLE IF EXISTS sessions")
+			cur.execute("DROP TABLE IF EXISTS summaries")
+			cur.execute("DROP TABLE IF EXISTS summary_tags")
+			cur.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+
+		cur.execute("""CREATE TABLE IF NOT EXISTS tag_dirs (
+						path TEXT PRIMARY KEY,
+						mtime_ns INTEGER,
+						entries TEXT)""")
+
+		cur.execute("""CREATE TABLE IF NOT EXISTS sessions (
+						path TEXT PRIMARY KEY,
+						tag_dir TEXT,
+						dir_mtime_ns INTEGER,
+						params_path TEXT,
+						params_mtime_ns INTEGER,
+						params_size INTEGER,
+						record BLOB)""")
+
+		cur.execute("CREATE INDEX IF NOT EXISTS sessions_tag_dir ON sessions (tag_dir)")
+
+		cur.execute("""CREATE TABLE IF NOT EXISTS summaries (
+						path TEXT PRIMARY KEY,
+						mtime_ns INTEGER,
+						size INTEGER,
+						summary TEXT)""")
+
+		#Tags of every stored summary, so that listing them does not decode the summaries
+		cur.execute("""CREATE TABLE IF NOT EXISTS summary_tags (
+						path TEXT,
+						tag TEXT,
+						PRIMARY KEY (path, tag))""")
+		self.conn.commit()
+
+	#Returns the session folders inside a tag folder; the stored listing is reused while the folder mtime is unchanged
+	def list_sessions(self, tag_dir):
+
+		tag_dir = os.path.abspath(tag_dir)
+		key = stat_key(tag_dir)
+
+		if key is None:
+			return []
+
+		with self.lock:
+			row = self.conn.execute("SELECT mtime_ns, entries FROM tag_dirs WHERE path = ?", (tag_dir,)).fetchone()
+
+		if row is not None and row[0] == key[0]:
+			return [os.path.join(tag_dir, entry) for entry in json.loads(row[1])]
+
+		#Hidden entries (.nfs*, .DS_Store) and plain files are not sessions, as with glob('*')
+		entries = sorted(entry.name for entry in os.scandir(tag_dir) if not entry.name.startswith('.') and entry.is_dir())
+		paths = set(os.path.join(tag_dir, entry) for entry in entries)
+
+		with self.lock:
+
+			self.conn.execute("INSERT OR REPLACE INTO tag_dirs VALUES (?, ?, ?)", (tag_dir, key[0], json.dumps(entries)))
+
+			#Forget sessions that are no longer in the folder
+			stored = self.conn.execute("SELECT path FROM sessions WHERE tag_dir = ?", (tag_dir,)).fetchall()
+			self.conn.executemany("DELETE FROM sessions WHERE path = ?", [(p,) for (p,) in stored if p not in paths])
+
+		return sorted(paths)
+
+	#Returns the stored TrainingSession if the session folder and its .params file are unchanged, else None
+	def lookup(self, session_dir):
+
+		session_dir = os.path.abspath(session_dir)
+
+		with self.lock:
+			row = self.conn.execute("""SELECT dir_mtime_ns, params_path, params_mtime_ns, params_size, record
+										FROM sessions WHERE path = ?""", (session_dir,)).fetchone()
+
+		if row is None:
+			return None
+
+		dir_mtime, params_path, params_mtime, params_size, record = row
+
+		dir_key = stat_key(session_dir)
+		if dir_key is None or dir_key[0] != dir_mtime:
+			return None
+
+		if stat_key(params_path) != (params_mtime, params_size):
+			return None
+
+		#The events file path is kept, not its stat, since it keeps growing during training
+		try:
+			session = pickle.loads(record)
+		except Exception:
+			return None
+
+		if not os.path.exists(session.tf_events_path):
+			return None
+
+		return session
+
+	#Stores or refreshes a parsed session
+	def store(self, session_dir, session):
+
+		session_dir = os.path.abspath(session_dir)
+		dir_key = stat_key(session_dir)
+		params_key = stat_key(session.params_path)
+
+		if dir_key is None or params_key is None:
+			return
+
+		record = (session_dir, os.path.dirname(session_dir), dir_key[0], session.params_path, params_key[0], params_key[1], pickle.dumps(session))
+
+		with self.lock:
+			self.conn.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?)", record)
+
+	#Returns the stored summary of an events file, or None if missing or if the file changed since
+	def get_summary(self, tf_events_path):
+
+		with self.lock:
+			row = self.conn.execute("SELECT mtime_ns, size, summary FROM summaries WHERE path = ?", (tf_events_path,)).fetchone()
+
+		if row is None or stat_key(tf_events_path) != (row[0], row[1]):
+			return None
+
+		return json.loads(row[2])
+
+	#Stores the summary of an events file; key is the file stat taken before decoding
+	def store_summary(self, tf_events_path, key, summary):
+
+		if key is None:
+			return
+
+		with self.lock:
+
+			self.conn.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)", (tf_events_path, key[0], key[1], json.dumps(summary)))
+			self.conn.execute("DELETE FROM summary_tags WHERE path = ?", (tf_events_path,))
+			self.conn.executemany("INSERT INTO summary_tags VALUES (?, ?)", [(tf_events_path, tag) for tag in summary])
+
+	#Sorted tags found in the stored summaries; one query, summaries are neither decoded nor checked for staleness
+	def summary_tags(self):
+
+		with self.lock:
+			return [tag for (tag,) in self.conn.execute("SELECT DISTINCT tag FROM summary_tags ORDER BY tag").fetchall()]
+
+	#Drops tag folders (and their sessions) that were not seen during a full scan
+	def prune(self, seen_tag_dirs):
+
+		seen = set(os.path.abspath(path) for path in seen_tag_dirs)
+
+		with self.lock:
+
+			stored = [path for (path,) in self.conn.execute("SELECT path FROM tag_dirs").fetchall()]
+
+			for path in stored:
+
+				if path not in seen:
+
+					self.conn.execute("DELETE FROM tag_dirs WHERE path = ?", (path,))
+					self.conn.execute("DELETE FROM sessions WHERE tag_dir = ?", (path,))
+
+	def commit(self):
+
+		with self.lock:
+			self.conn.commit()
+
+	def close(self):
+
+		with self.lock:
+			self.conn.commit()
+			self.conn.close()
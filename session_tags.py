@@ -0,0 +1,112 @@
+#Model tags are matched without the "Ant " prefix, as in the tag folder names
+def model_key(model_tags):
+
+	return model_tags.strip("Ant ")
+
+
+
+
+#================ SESSION TAG INDEX ====================
+#Inverted index from session tags (model tags, reward tags, hidden size, batch size) to session ids,
+#where a session id is the position of the session in SessionLoader.sessions.
+#Every key keeps the set of ids that have it; a selection intersects the sets of the keys that are given,
+#starting from the smallest one, and a key left to None ("All") is not looked at.
+class SessionTagIndex:
+
+	def __init__(self):
+
+		self.postings = {'model': {}, 'reward': {}, 'hidden': {}, 'batch': {}}
+		self.size = 0
+
+	def __len__(self):
+
+		return self.size
+
+	#Indexes a new session; ids are expected to grow with every session added
+	def add(self, session_id, model_tags, reward_tags, hidden, batch):
+
+		keys = {'model': model_key(model_tags), 'reward': reward_tags, 'hidden': hidden, 'batch': batch}
+
+		for field, key in keys.items():
+			self.postings[field].setdefault(key, set()).add(session_id)
+
+		self.size = max(self.size, session_id + 1)
+
+	#Ids of the sessions matching every given key, in increasing order; None matches any value
+	def select(self, model_tags = None, reward_tags = None, hidden = None, batch = None):
+
+		keys = {'model': model_key(model_tags) if model_tags is not None else None, 'reward': reward_tags, 'hidden': hidden, 'batch': batch}
+		postings = []
+
+		for field, key in keys.items():
+
+			if key is None:
+				continue
+
+			ids = self.postings[field].get(key)
+
+			if not ids:
+				return []
+
+			postings.append(ids)
+
+		if len(postings) == 0:
+			return list(range(self.size))
+
+		postings.sort(key = len)
+		return sorted(postings[0].intersection(*postings[1:]))
+
+
+
+
+#================ SESSION FACETS ====================
+#Session counts of every (model tags, reward tags, size) combination, "All" (None) included, for the Select Scalar menus.
+#Counts and the option lists are updated as sessions are added, so the menus never scan the sessions;
+#options keep the order in which they were first seen.
+class SessionFacets:
+
+	def __init__(self):
+
+		#(model, reward, size) -> number of sessions; size is (hidden_size, batch_size)
+		self.counts = {}
+
+		#Reward tags seen with a model, and sizes seen with a model and a reward (dicts used as ordered sets)
+		self.rewards = {}
+		self.sizes = {}
+
+	#Counts a new session in the 8 combinations it belongs to
+	def add(self, model_tags, reward_tags, hidden, batch):
+
+		model = model_key(model_tags)
+		size = (hidden, batch)
+
+		for m in (model, None):
+
+			self.rewards.setdefault(m, {})[reward_tags] = None
+
+			for r in (reward_tags, None):
+
+				self.sizes.setdefault((m, r), {})[size] = None
+
+				for s in (size, None):
+
+					key = (m, r, s)
+					self.counts[key] = self.counts.get(key, 0) + 1
+
+	#Number of sessions matching the given keys; None matches any value
+	def count(self, model_tags = None, reward_tags = None, size = None):
+
+		model = model_key(model_tags) if model_tags is not None else None
+		return self.counts.get((model, reward_tags, size), 0)
+
+	#Reward tags available for a model, with their session count
+	def reward_options(self, model_tags = None):
+
+		model = model_key(model_tags) if model_tags is not None else None
+		return [(reward, self.counts[(model, reward, None)]) for reward in self.rewards.get(model, ())]
+
+	#Sizes (hidden_size, batch_size) available for a model and a reward, with their session count
+	def size_options(self, model_tags = None, reward_tags = None):
+
+		model = model_key(model_tags) if model_tags is not None else None
+		return [(size, self.counts[(model, reward_tags, size)]) for size in self.sizes.get((model, reward_tags), ())]
@@ -4,9 +4,17 @@ from params import TrainingParameters
 import re
 from typing import List, Type
 from dataclasses import dataclass
-from tbparse import SummaryReader
 from multiprocessing import Pool
-import glob
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+from session_index import SessionIndex, stat_key
+from scalar_cache import ScalarCache
+from tfrecord_reader import read_scalars, list_tags, sample_columns, EventsFileTail
+from ranking import summarize_columns
+from session_tags import SessionTagIndex, SessionFacets
+from scalar_run import ScalarRun
+import struct
 
 
 
@@ -35,6 +43,222 @@ class TrainingSession:
 
 
 
+#================ SCANNING ====================
+#Threads used to scan a trainings dir; the scan waits on the file system (often a network one), not on Python
+SCAN_WORKERS = 16
+
+#Session folders handled by one scan task: index lookups, file search and .params parsing
+SCAN_BATCH = 32
+
+#'name: value' pairs of a .params file
+_params_field = re.compile(r'(.+): (.+)')
+
+#Types of the dataclass attributes, looked up once per attribute name; None for unknown names
+_attr_types = {}
+
+def _attr_type(dataclass_type, attr_name):
+
+	key = (dataclass_type, attr_name)
+
+	if key not in _attr_types:
+		_attr_types[key] = type(getattr(dataclass_type, attr_name)) if hasattr(dataclass_type, attr_name) else None
+
+	return _attr_types[key]
+
+#Returns the .params file and the events file of a session folder (<session>/*/*.params and <session>/*/*/events*),
+#found with scandir rather than glob; None for a file that is missing
+#>hidden entries are skipped, as glob does; the first match in name order is returned
+def find_session_files(session_dir):
+
+	params_path = None
+	tf_events_path = None
+
+	for child in sorted(os.scandir(session_dir), key = lambda entry: entry.name):
+
+		if child.name.startswith('.') or not child.is_dir():
+			continue
+
+		for entry in sorted(os.scandir(child.path), key = lambda entry: entry.name):
+
+			if entry.name.startswith('.'):
+				continue
+
+			if params_path is None and entry.name.endswith('.params') and entry.is_file():
+
+				params_path = entry.path
+
+			elif tf_events_path is None and entry.is_dir():
+
+				events = sorted(e.name for e in os.scandir(entry.path) if e.name.startswith('events'))
+
+				if len(events) > 0:
+					tf_events_path = os.path.join(entry.path, events[0])
+
+		if params_path is not None and tf_events_path is not None:
+			break
+
+	return params_path, tf_events_path
+
+
+
+
+#================ WORKER POOL ====================
+#Long-lived process pool shared by every load
+#>tbparse is only imported by a worker that falls back to it (see decode_events_file)
+_pool = None
+_pool_size = None
+
+#Guards creation and shutdown of the pool, which may be requested from several threads at once
+_pool_lock = threading.Lock()
+
+#Worker initializer
+def _init_worker():
+
+	os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+#Number of workers; one per core available to this process
+def default_workers():
+
+	try:
+		return max(1, len(os.sched_getaffinity(0)))
+	except AttributeError:
+		return max(1, os.cpu_count() or 1)
+
+#Returns the shared pool, creating it on first use
+#>call it early (e.g. at startup) to have the workers warm when the first load is requested
+def get_pool(processes = None):
+
+	global _pool, _pool_size
+
+	with _pool_lock:
+
+		if _pool is None:
+
+			_pool_size = processes if processes is not None else default_workers()
+			_pool = Pool(processes = _pool_size, initializer = _init_worker)
+
+		return _pool
+
+#Terminates the shared pool; a new one is created on the next get_pool()
+def shutdown_pool():
+
+	global _pool
+
+	with _pool_lock:
+
+		if _pool is not None:
+
+			_pool.terminate()
+			_pool.join()
+			_pool = None
+
+#Runs function over tasks on the pool and yields the results as they come back
+#>sliding window: a few tasks per worker are in flight, the rest is only submitted as results come back,
+# so that a cancelled run leaves little queued work behind; cancel is an optional threading.Event
+def run_windowed(pool, function, tasks, cancel = None):
+
+	results = queue.Queue()
+	window = 2 * (_pool_size if _pool_size is not None else default_workers())
+	submitted = 0
+	pending = 0
+
+	while submitted < len(tasks) or pending > 0:
+
+		while submitted < len(tasks) and pending < window and not (cancel is not None and cancel.is_set()):
+
+			pool.apply_async(function, (tasks[submitted],), callback = results.put, error_callback = results.put)
+			submitted += 1
+			pending += 1
+
+		if pending == 0:
+			break
+
+		result = results.get()
+		pending -= 1
+
+		if isinstance(result, BaseException):
+			raise result
+
+		yield result
+
+#Main loading function; executed by the pool workers
+#>the task id travels along so that unordered results can be matched to their session
+#>options: 'native' uses the built-in TFRecord decoder (tbparse is the fallback),
+# 'tags' only decodes a tag selection (see tfrecord_reader.tag_filter),
+# 'max_samples' caps the rows kept per tag (reservoir sampling),
+# 'cache_dir' decodes every tag and writes them to the scalar cache before taking the tag selection
+def load_events_file(task):
+
+	task_id, tf_events_path, options = task
+
+	return task_id, decode_events_file(tf_events_path, options)[1]
+
+#Summary function; executed by the pool workers by the precompute stage
+#>returns the events file stat taken before decoding along with the per tag summaries
+def summarize_events_file(task):
+
+	task_id, tf_events_path, options = task
+
+	if options.get('cache_dir') is not None:
+
+		key = stat_key(tf_events_path)
+		columns = ScalarCache(options['cache_dir']).get_columns(tf_events_path)
+
+		if columns is not None:
+			return task_id, key, summarize_columns(columns)
+
+	key, columns = decode_events_file(tf_events_path, options)
+	return task_id, key, summarize_columns(columns)
+
+#Decodes an events file as scalar columns (see load_events_file for the options); returns its stat and the columns
+def decode_events_file(tf_events_path, options):
+
+	key = stat_key(tf_events_path)
+	tags = options.get('tags')
+	max_samples = options.get('max_samples')
+	scalars = None
+
+	#With a cache, every tag is decoded and cached, and the selection is taken afterwards;
+	#>so tag-selective loads fill the cache too, and plots added later are served from it
+	cache_dir = options.get('cache_dir')
+	decode_tags = tags if cache_dir is None else None
+
+	if options.get('native', True):
+
+		try:
+			scalars = read_scalars(tf_events_path, tags = decode_tags, max_samples = max_samples)
+		except (IOError, ValueError, IndexError, struct.error):
+			scalars = None
+
+	if scalars is None:
+
+		from tbparse import SummaryReader
+
+		reader = SummaryReader(tf_events_path)
+		scalars = ScalarCache.frame_to_columns(reader.scalars) if 'tag' in reader.scalars.keys() else None
+
+		if scalars is not None:
+			scalars = sample_columns(ScalarCache.select_tags(scalars, decode_tags), max_samples)
+
+	if scalars is not None and cache_dir is not None:
+
+		ScalarCache(cache_dir).put(tf_events_path, scalars, key, max_samples)
+		scalars = ScalarCache.select_tags(scalars, tags)
+
+	return key, scalars
+
+#Tag listing function; executed by the pool workers
+def list_events_tags(task):
+
+	task_id, tf_events_path = task
+
+	try:
+		return task_id, list_tags(tf_events_path)
+	except (IOError, ValueError, IndexError, struct.error):
+		return task_id, []
+
+
+
 
 
 
@@ -44,140 +268,263 @@ class TrainingSession:
 #A fancy frame for tbparse SummaryReader
 class SessionLoader:
 
-	def __init__(self, trainings_dir):
+	def __init__(self, trainings_dir, use_index = True, use_cache = True, cache_dir = None, native_reader = True, max_samples = None):
 
 		#Initialize sessions' arrays
 		#>dict has been added, but is not fully integrated in the system; TFReaerWin could use it for labels
-		self.trainings_dir = trainings_dir
+		#>paths are resolved against trainings_dir, never against the working directory, so scans and loads can run from any thread
+		self.trainings_dir = os.path.abspath(trainings_dir)
 		self.model_tags = []
 		self.reward_tags = []
 		self.size_tags = []
 		self.sessions = []
-		self.model_dict = {}
-		self.size_dict = {}
-		self.main_dir = os.getcwd()
+
+		#Guards the sessions list and the tag dicts, indexes and facets, shared by concurrent scans and loads
+		self.lock = threading.RLock()
+
+		#Inverted index from model/reward tags and sizes to positions in self.sessions; used to select sessions
+		self.tag_index = SessionTagIndex()
+
+		#Session counts of every model/reward/size combination; feeds the Select Scalar menus
+		self.facets = SessionFacets()
+
+		#Persistent session index; avoids re-globbing and re-parsing unchanged sessions at startup
+		self.index = SessionIndex(trainings_dir, cache_dir) if use_index else None
+
+		#Columnar cache of decoded events files; avoids decoding unchanged files again
+		self.scalar_cache = ScalarCache(os.path.join(cache_dir, 'scalars') if cache_dir is not None else None) if use_cache else None
+
+		#Decode events files with the built-in scalar reader instead of tbparse
+		self.native_reader = native_reader
+
+		#Per tag sample budget applied while decoding (reservoir sampling, first and last step kept); None keeps every point
+		self.max_samples = max_samples
+
+		#Tag listings of events files, keyed by path and validated with the file stat
+		self.tag_listings = {}
+
+		#Threads used by parse_sessions()
+		self.scan_workers = SCAN_WORKERS
 
 		self.entries_update = False
 
 	#Retrieves all the combinations of 'hidden_size, batch_size' from the params dataclass
+	#>read from the facet counts, which are kept up to date as sessions are added
 	def get_size_tags(self):
 
-		for session in self.sessions:
+		with self.lock:
+			self.size_tags = [f"{hidden},{batch}" for (hidden, batch), count in self.facets.size_options()]
 
-			batch = session.params[0].batch_size
-			hidden = session.params[0].hidden_size
-			size_str = f"{hidden},{batch}"
-			if size_str in self.size_tags:
-				pass
-			else:
-				self.size_tags.append(size_str)
+	#Reward tags available for a model ("All" for every model), with their session count
+	def reward_options(self, model):
 
-	#Updates model tags dict assigning every folder to its model tag combination
-	def update_tags_dict(self, folder_name,):       
-		
-	  #Find matches
-		pattern = r'(.*) \| (.*)'
-		match = re.match(pattern, folder_name)
+		with self.lock:
+			return self.facets.reward_options(None if model == "All" else model)
 
-		if match:
+	#Sizes available for a model and a reward ("All" for every model), with their session count
+	def size_options(self, model, reward):
 
-			#Strip tags of unnecessary characters
-			model_tags = match.group(1).strip("Ant ")
+		with self.lock:
+			return self.facets.size_options(None if model == "All" else model, None if reward == "All" else reward)
 
-			#Create entry if new; else append to existing values
-			if model_tags in self.model_dict:
-			
-				self.model_dict[model_tags].append(glob.glob(glob.escape(folder_name))[0])
-			else:
-				
-				self.model_dict[model_tags] = [glob.glob(glob.escape(folder_name))[0]]
+	#Adds the model and reward tags of a tag folder to the menu entries
+	def add_tags(self, model_tags, reward_tags):
+
+		with self.lock:
+
+			if model_tags not in self.model_tags:
+				self.model_tags.append(model_tags)
+
+			if reward_tags not in self.reward_tags:
+				self.reward_tags.append(reward_tags)
 				
 
-	#Updates available sizes for model+reward tags
-	def update_size_dict(self):
+	#Appends a session, indexes its tags and counts it in the facets
+	def add_session(self, session):
 
-		#Scan sessions
-		for session in self.sessions:
+		hidden, batch = session.params[0].hidden_size, session.params[0].batch_size
 
-			key = session.model_tags+session.reward_tags
-			size = [session.params[0].hidden_size, session.params[0].batch_size, 1]
-			match = None
+		with self.lock:
 
-			#If key in dict
-			if key in self.size_dict.keys():
-				
-				#If the size is already in values
-				for i, item in enumerate(self.size_dict[key]):
+			self.tag_index.add(len(self.sessions), session.model_tags, session.reward_tags, hidden, batch)
+			self.facets.add(session.model_tags, session.reward_tags, hidden, batch)
+			self.sessions.append(session)
+
+	#Options handed to the workers along with every events file
+	def load_options(self, tags = None):
 
-					if size[0] == item[0] and size[1] == item[1]:
+		return {
+			'native': self.native_reader,
+			'tags': tags,
+			'max_samples': self.max_samples,
+			'cache_dir': self.scalar_cache.cache_dir if self.scalar_cache is not None else None,
+		}
 
-						match = i
-						break
+	#Loads the given sessions; cached ones are served directly, the others on the worker pool
+	#>yields (session, scalars) as soon as each one is ready, not in submission order
+	#>tags restricts decoding to a tag set or regex; only those series are kept in memory
+	#>cancel is an optional threading.Event; once set, no further events file is submitted
+	def load_sessions(self, sessions, pool = None, tags = None, cancel = None):
 
-				#Increase size counter 
-				#> OptionsMenu will show as entr "hidden_size, batch_size (n entries)"
-				if match is not None:
+		tasks = []
 
-					self.size_dict[key][match][-1] += 1
+		for i, session in enumerate(sessions):
 
-				#Else, add it
-				else:
+			if cancel is not None and cancel.is_set():
+				return
 
-					self.size_dict[key].append(size)
+			scalars = self.scalar_cache.get_columns(session.tf_events_path, tags, self.max_samples) if self.scalar_cache is not None else None
 
-			#Else, add it
+			if scalars is not None:
+				yield session, scalars
 			else:
-				
-				self.size_dict[key] = [size]
+				tasks.append((i, session.tf_events_path, self.load_options(tags)))
 
+		if len(tasks) == 0:
+			return
 
-	#Retrives correct session folder after model and reward tags
-	def retrieve_folder(self, model, reward):
+		if pool is None:
+			pool = get_pool()
 
-  
-		mod = model.strip('Ant ')
-		rew = reward
+		for i, scalars in run_windowed(pool, load_events_file, tasks, cancel):
+			yield sessions[i], scalars
 
+		#Keep the cache folder within its size bound
+		if self.scalar_cache is not None:
+			self.scalar_cache.evict()
 
+	#Returns the scalar tags of every given session without decoding values
+	#>served from the scalar cache or from earlier listings when the events file is unchanged; else listed on the pool
+	#>progress, if given, is called with (done, total) as sessions are listed;
+	# cancel is an optional threading.Event; once set, nothing more is submitted and None is returned
+	def list_tags(self, sessions, pool = None, cancel = None, progress = None):
 
+		listings = {}
+		tasks = []
 
-		for key in self.model_dict.keys():
+		for i, session in enumerate(sessions):
 
-			#All models selected
-			if model == "All":
+			path = session.tf_events_path
+			key = stat_key(path)
 
-				for value in self.model_dict[key]:
+			with self.lock:
+				known = self.tag_listings.get(path)
 
-					#All reward selected
-					if rew == "All":
+			if known is not None and known[0] == key:
+				listings[id(session)] = known[1]
+				continue
 
-						yield value
+			tags = self.scalar_cache.get_tags(path) if self.scalar_cache is not None else None
 
-					#Check reward
-					if value.endswith(rew):
+			if tags is not None:
 
-						yield value
+				with self.lock:
+					self.tag_listings[path] = (key, tags)
 
-			#Check model
-			if mod == key and key.endswith(mod):
-				
-				for value in self.model_dict[mod]:
+				listings[id(session)] = tags
+			else:
+				tasks.append((i, path))
 
-					#All reward selected
-					if rew == "All":
-						
-						yield value
+		if progress is not None:
+			progress(len(listings), len(sessions))
+
+		if len(tasks) > 0:
+
+			if pool is None:
+				pool = get_pool()
+
+			for i, tags in run_windowed(pool, list_events_tags, tasks, cancel):
+
+				if cancel is not None and cancel.is_set():
+					break
+
+				path = sessions[i].tf_events_path
+				key = stat_key(path)
+
+				with self.lock:
+					self.tag_listings[path] = (key, tags)
+				listings[id(sessions[i])] = tags
+
+				if progress is not None:
+					progress(len(listings), len(sessions))
+
+		if cancel is not None and cancel.is_set():
+			return None
+
+		return [listings[id(session)] for session in sessions]
+
+	#Stored per tag summaries of the sessions' events files ({tag: {field: value}}); None where missing or stale
+	def get_summaries(self, sessions):
+
+		if self.index is None:
+			return [None for _ in sessions]
 
-					#Check reward
-					if value.endswith(rew):
+		return [self.index.get_summary(session.tf_events_path) for session in sessions]
 
-						yield value
+	#Computes the summaries of the given sessions (every scanned one by default) on the worker pool and stores
+	#them in the session index; sessions whose events file did not change since are skipped
+	#>generator; yields (done, total) after every session
+	def precompute_summaries(self, sessions = None, pool = None):
 
-	#Main loading function; called in a multiprocessing Pool
-	def process_session(self, session):
+		if self.index is None:
+			return
 
-		reader = SummaryReader(session.tf_events_path)
-		return reader.scalars
+		sessions = sessions if sessions is not None else self.sessions
+		options = {'native': self.native_reader, 'cache_dir': self.scalar_cache.cache_dir if self.scalar_cache is not None else None}
+		tasks = [(i, session.tf_events_path, options) for i, session in enumerate(sessions) if self.index.get_summary(session.tf_events_path) is None]
+
+		if len(tasks) == 0:
+			return
+
+		if pool is None:
+			pool = get_pool()
+
+		for done, (i, key, summary) in enumerate(pool.imap_unordered(summarize_events_file, tasks), 1):
+
+			self.index.store_summary(sessions[i].tf_events_path, key, summary)
+
+			if done % 100 == 0:
+				self.index.commit()
+
+			yield done, len(tasks)
+
+		self.index.commit()
+
+		if self.scalar_cache is not None:
+			self.scalar_cache.evict()
+
+	#Tags found in the stored summaries, for the ranking menu
+	#>read from the index in one query; staleness is only checked for the sessions actually ranked (rank_sessions)
+	def summary_tags(self):
+
+		return self.index.summary_tags() if self.index is not None else []
+
+	#Ranks sessions on a summary statistic of a tag, best first, without decoding any events file
+	#>minimum drops sessions whose statistic is lower; top keeps the best ones only;
+	# sessions without the tag (or not precomputed) go last, and are dropped when filtering on minimum
+	def rank_sessions(self, sessions, tag, stat = 'last', minimum = None, top = None):
+
+		scored = []
+		unscored = []
+
+		for session, summary in zip(sessions, self.get_summaries(sessions)):
+
+			if summary is None or tag not in summary:
+				unscored.append(session)
+				continue
+
+			value = summary[tag][stat]
+
+			if minimum is not None and not value >= minimum:
+				continue
+
+			scored.append((value, session))
+
+		#NaN statistics rank last
+		scored.sort(key = lambda item: item[0] if item[0] == item[0] else float('-inf'), reverse = True)
+		ranked = [session for _, session in scored] + (unscored if minimum is None else [])
+
+		return ranked[:top] if top else ranked
 
 	#Generates the name string for the session
 	def get_name(self, session):
@@ -186,42 +533,51 @@ class SessionLoader:
 		string = f'{model_t}\n{session.reward_tags} [{session.params[0].hidden_size},{session.params[0].batch_size}]\n'
 		return string
 
+	#Returns the sessions matching the selected model and reward tags and size
+	#>"All" (or a 0,0 size) leaves a key out of the selection; sessions keep their scan order
+	def select_sessions(self, model, reward, batch = 0, hid = 0):
+
+		all_sizes = batch == 0 and hid == 0
+
+		with self.lock:
+
+			ids = self.tag_index.select(None if model == "All" else model,
+										None if reward == "All" else reward,
+										None if all_sizes else hid,
+										None if all_sizes else batch)
+
+			return [self.sessions[i] for i in ids]
+
 	#Scalar retrieval function; checks all the selected tags
-	def get_scalar_from_tags(self, model, reward, batch = 0, hid = 0, pool = None):      
+	#>tags (a set of tags or a regex) only loads the matching series
+	def get_scalar_from_tags(self, model, reward, batch = 0, hid = 0, pool = None, tags = None):      
 
-		os.chdir(self.trainings_dir)
-		tmp = []
+		selected = self.select_sessions(model, reward, batch, hid)
 
+		#Fan out to the workers; results are put back in selection order
+		scalars = {}
 
-		#Find only relevant session folders
-		selected_folder_iterator = self.retrieve_folder(model, reward)
+		for session, scalar in self.load_sessions(selected, pool, tags):
 
+			scalars[id(session)] = scalar
 
-		#Initialize pool
-		if pool is None:
-			pool = Pool(processes = 10)
+		#Append [scalars, session_name, training_parameters, session]
+		return [[scalars[id(session)], self.get_name(session), session.params[0], session] for session in selected]
 
-		for folder in selected_folder_iterator:
 
-			for session in self.sessions:
-				
-				if folder+'/' in session.tf_events_path:
 
-					#Check for size matches                                         
-					if session.params[0].batch_size == batch and session.params[0].hidden_size == hid and batch != 0 and hid != 0:
+	#Loads the given sessions as ScalarRun objects, in the given order; used without the GUI (scripts, notebooks)
+	#>runs without scalars are skipped
+	def load_runs(self, sessions, pool = None, tags = None):
 
-						#Append [session, session_name, training_parameters]
-						tmp.append([pool.apply(self.process_session, args=(session,)), self.get_name(session), session.params[0]])          
+		scalars = {}
 
-					#All sizes selected             
-					if batch == 0 and hid == 0:
+		for session, scalar in self.load_sessions(sessions, pool, tags):
 
-						#Append [session, session_name, training_parameters]
-						tmp.append([pool.apply(self.process_session, args=(session,)), self.get_name(session), session.params[0]])  
+			scalars[id(session)] = scalar
 
-		os.chdir(self.main_dir)           
-		
-		return tmp
+		runs = [ScalarRun(scalars[id(session)], session.params[0], self.get_name(session), session) for session in sessions]
+		return [run for run in runs if len(run.scalar) > 0]
 
 
 
@@ -230,6 +586,7 @@ class SessionLoader:
 	def generate_session(self, path = None, model_tags = None, reward_tags = None, directory = None, from_gui = False):
 
 		assert path != None
+		path = os.path.abspath(path)
 
 		#If the fn was called by GUI, preprocess the only argument: path
 		if from_gui:
@@ -237,28 +594,17 @@ class SessionLoader:
 			try:
 
 
-				model = os.path.basename(os.path.dirname(path))
-				global_path = glob.glob(glob.escape(os.path.dirname(path)))
-
-				#Update manually model dict
-				model_tags, reward_tags = model.split('|')
-				if model_tags in self.model_dict:
-				
-					self.model_dict[model_tags.strip("Ant ")].append(global_path)
+				tag_dir = os.path.dirname(path)
 
-				else:
-					
-					self.model_dict[model_tags.strip("Ant ")] = global_path
+				if not os.path.isdir(tag_dir):
+					return -1
 
+				model_tags, reward_tags = os.path.basename(tag_dir).split('|')
 
 				directory = path
 
 				#Generate model and reward tags "dict"
-				if model_tags not in self.model_tags:
-					self.model_tags.append(model_tags)
-
-				if reward_tags not in self.reward_tags:
-					self.reward_tags.append(reward_tags)
+				self.add_tags(model_tags, reward_tags)
 				self.entries_update = True
 
 			#Return value for Error window
@@ -267,99 +613,169 @@ class SessionLoader:
 
 
 
+		temp = self.read_session(path, model_tags, reward_tags, directory)
+		self.add_session(temp)
+
+		if from_gui:
+			self.get_size_tags()
+
+		if self.index is not None:
+
+			self.index.store(path, temp)
+
+			if from_gui:
+				self.index.commit()
+
+	#Builds the TrainingSession of a session folder; raises IndexError if its .params or events file is missing
+	#>safe to call from the scan threads; the session is not added
+	def read_session(self, path, model_tags, reward_tags, directory):
+
 		#Assign values to training session
 		temp = TrainingSession()
 		temp.model_tags = model_tags
 		temp.reward_tags = reward_tags
 		temp.tags_dir = os.path.abspath(directory)
 
-		#Retrieve .params file
-		#>a dataclass printed to the file during training
-		params_path = glob.glob(glob.escape(f"{path}")+"/*/*.params")[0]                   
-		temp.params_path = os.path.abspath(params_path)
+		#Retrieve .params file (a dataclass printed to the file during training) and tf_events file path
+		params_path, tf_events_path = find_session_files(path)
+
+		if params_path is None or tf_events_path is None:
+			raise IndexError(f"No .params or events file found in {path}")
+
+		temp.params_path = params_path
+		temp.tf_events_path = tf_events_path
 
 		#Parse .params file
 		temp.params = self.read_dataclass_file(params_path, TrainingParameters)
 
-		#Retrieve tf_events file path
-		tf_events_path = glob.glob(glob.escape(f"{path}")+"/*/*/events*")[0]         
-		temp.tf_events_path = os.path.abspath(tf_events_path)
+		return temp
+
+	#Scan task; returns the sessions of a batch of session folders of the same tag folder, in order
+	#>unchanged sessions come from the index, the others are read and stored in it
+	def scan_session_batch(self, task):
+
+		directory, model_tags, reward_tags, session_dirs = task
+		sessions = []
 
+		for session_dir in session_dirs:
 
-		self.sessions.append(temp)
+			#Reuse the indexed session if nothing changed on disk
+			session = self.index.lookup(session_dir) if self.index is not None else None
+
+			if session is None:
+
+				session = self.read_session(session_dir, model_tags, reward_tags, directory)
+
+				if self.index is not None:
+					self.index.store(session_dir, session)
+
+			sessions.append(session)
+
+		return sessions
+
+	#Session folders of a tag folder; scan task
+	def list_tag_dir(self, directory):
+
+		if self.index is not None:
+			return self.index.list_sessions(directory)
+
+		#Same filter as SessionIndex.list_sessions: hidden entries and plain files are not sessions
+		return sorted(entry.path for entry in os.scandir(directory) if not entry.name.startswith('.') and entry.is_dir())
 
 
 	#Scans training dir and seeks for sessions
 	#>exclude_faults = True discards training with a valid tag name but that ends with .something
 	def parse_sessions(self, path = None, exclude_faults = True, from_gui = False):
 
-	  #Go to trainings dir		
+		#Tag folders are listed from the trainings dir, or from the parent of the given tag folder
 		if path == None:
 
-			os.chdir(self.trainings_dir)
+			root = self.trainings_dir
 
 		else:
 
-			os.chdir(glob.glob(glob.escape(os.path.dirname(path)))[0])
+			path = os.path.abspath(path)
+			root = os.path.dirname(path)
 			self.entries_update = True
 
-		for directory in glob.glob('*'):
+		tag_dirs = []
+
+		for entry in sorted(os.scandir(root), key = lambda entry: entry.name):
+
+			directory = entry.path
+			name = entry.name
+
+			#Skip hidden entries, as glob does
+			if name.startswith('.'):
+				continue
 
 			#Exclude every dir ending in .something
-			if exclude_faults and '.' in directory:
+			if exclude_faults and '.' in name:
 				continue
 		
 			if path != None:
-				if directory != os.path.basename(path):
+				if directory != path:
 					continue
 
-
-
-
-			self.update_tags_dict(directory)
-
 			#Split dir name string
-			model_tags, reward_tags = directory.split('|')
+			model_tags, reward_tags = name.split('|')
 
 			#Generate model and reward tags "dict"
 			#>should be changed into a real dict later
-			if model_tags not in self.model_tags:
-				self.model_tags.append(model_tags)
+			self.add_tags(model_tags, reward_tags)
+			tag_dirs.append((directory, model_tags, reward_tags))
+
+		#Folders are listed, stat'ed and read on a thread pool, in batches of sessions;
+		#>results are consumed in order, so sessions are added in the same order as a serial scan
+		with ThreadPoolExecutor(max_workers = self.scan_workers) as executor:
 
-			if reward_tags not in self.reward_tags:
-				self.reward_tags.append(reward_tags)
-			
 			#Get different training in model|reward dirs
-			sub_models = glob.glob(glob.escape(f'{directory}')+'/*')
+			listings = executor.map(self.list_tag_dir, [directory for directory, _, _ in tag_dirs])
+			tasks = []
+
+			for (directory, model_tags, reward_tags), sub_models in zip(tag_dirs, listings):
 
-			for model in sub_models:
+				for i in range(0, len(sub_models), SCAN_BATCH):
+					tasks.append((directory, model_tags, reward_tags, sub_models[i:i+SCAN_BATCH]))
 
-				tmp = self.generate_session(model, model_tags, reward_tags, directory)
+			for sessions in executor.map(self.scan_session_batch, tasks):
 
-				if tmp == -1:
-					raise Exception
+				for session in sessions:
+					self.add_session(session)
+
+		#Forget tag folders deleted since the last full scan
+		if self.index is not None:
+
+			if path == None:
+				self.index.prune([directory for directory, _, _ in tag_dirs])
+
+			self.index.commit()
 
-		os.chdir(self.main_dir)
 		self.get_size_tags()
 
 	#Dataclass parsing function; used to read training dataclass file
 	def read_dataclass_file(self, filename: str, dataclass_type: Type = TrainingParameters) -> List:
 
-		bool_mapping = {"true": True, "false": False}
-		
-		#Open file
+		#Open file; the dataclass is printed on the first line
 		with open(filename, 'r') as f:
-			lines = f.readlines()
+			text = f.readline()
+
+		return self.parse_dataclass(text, dataclass_type)
+
+	#Parses a dataclass printed by a training (first line of a .params file)
+	def parse_dataclass(self, text, dataclass_type: Type = TrainingParameters) -> List:
+
+		bool_mapping = {"true": True, "false": False}
 
 		objects = []
 
 		#delete unnecessary chars
-		for line in lines[0].split(">,  <"):
+		for line in text.split(">,  <"):
 			line = line.split("<")[0]
 			line = line.split(">")[0]
 
 			#Check for matches			
-			match = re.search(r'(.+): (.+)', line)
+			match = _params_field.search(line)
 
 			if match:
 
@@ -368,11 +784,10 @@ class SessionLoader:
 				attr_name = attr_name.strip(" ")
 				attr_value = attr_value.strip(" ")
 
-				#If the value is in the dataclass
-				if hasattr(dataclass_type, attr_name):
-					
-					#Get the dataclass attribute value
-					attr_type = type(getattr(dataclass_type, attr_name))
+				#Get the dataclass attribute type, if the value is in the dataclass
+				attr_type = _attr_type(dataclass_type, attr_name)
+
+				if attr_type is not None:
 
 					#If the value is valid
 					if attr_value != "None":
@@ -399,4 +814,117 @@ class SessionLoader:
 
 
 
+#================ LOAD JOB ====================
+#Runs a load on a separate thread and reports through a queue, so that a GUI can poll it without blocking.
+#Messages: ('listing', done, total) during the listing pass, ('loaded', session, scalars, listing) for every session
+#as it finishes, then ('done', None) or ('error', exception).
+#>tag_selection, if given, is called with the set of listed tags and returns the tags to decode (tag-selective loading)
+#>tags, if given instead, are decoded as they are, without the listing pass (tags added to runs already loaded)
+class LoadJob(threading.Thread):
+
+	def __init__(self, loader, sessions, tag_selection = None, tags = None):
+
+		super().__init__(daemon = True)
+		self.loader = loader
+		self.sessions = sessions
+		self.tag_selection = tag_selection
+		self.tags = tags
+		self.queue = queue.Queue()
+		self.cancelled = threading.Event()
+
+	#Stops submitting work; sessions already being decoded are discarded
+	def cancel(self):
+
+		self.cancelled.set()
+
+	#Progress of the listing pass
+	def listed(self, done, total):
+
+		self.queue.put(('listing', done, total))
+
+	def run(self):
+
+		try:
+
+			#Listing pass first; then only the needed tags are decoded
+			if self.tag_selection is not None:
+
+				listings = self.loader.list_tags(self.sessions, cancel = self.cancelled, progress = self.listed)
+
+				if listings is None:
+					self.queue.put(('done', None))
+					return
+
+				tags = self.tag_selection(set(tag for listing in listings for tag in listing))
+
+			else:
+
+				listings = [None for session in self.sessions]
+				tags = self.tags
+
+			listing_of = {id(session): listing for session, listing in zip(self.sessions, listings)}
+
+			for session, scalars in self.loader.load_sessions(self.sessions, tags = tags, cancel = self.cancelled):
+
+				if self.cancelled.is_set():
+					break
+
+				self.queue.put(('loaded', session, scalars, listing_of[id(session)]))
+
+			self.queue.put(('done', None))
+
+		except Exception as e:
+
+			self.queue.put(('error', e))
+
+
+
+
+#================ LIVE TAIL ====================
+#Background thread that follows the events files of in-progress trainings.
+#Every interval it polls each followed file and puts ('appended', tf_events_path, scalars) in the queue
+#with only the scalars written since the previous poll
+class LiveTail(threading.Thread):
+
+	def __init__(self, interval = 5.0):
+
+		super().__init__(daemon = True)
+		self.interval = interval
+		self.queue = queue.Queue()
+		self.tails = {}
+		self.lock = threading.Lock()
+		self.stopped = threading.Event()
+
+	#Starts following an events file from the given byte offset
+	def follow(self, tf_events_path, offset, scalar_tags = ()):
+
+		with self.lock:
+
+			if tf_events_path not in self.tails:
+				self.tails[tf_events_path] = EventsFileTail(tf_events_path, offset, scalar_tags)
+
+	def unfollow(self, tf_events_path):
+
+		with self.lock:
+			self.tails.pop(tf_events_path, None)
+
+	def stop(self):
+
+		self.stopped.set()
+
+	def run(self):
+
+		while not self.stopped.wait(self.interval):
+
+			with self.lock:
+				tails = list(self.tails.items())
+
+			for path, tail in tails:
+
+				try:
+					columns = tail.poll()
+				except (IOError, ValueError, IndexError, struct.error):
+					columns = None
 
+				if columns is not None:
+					self.queue.put(('appended', path, columns))
@@ -0,0 +1,175 @@
+import numpy as np
+from collections import OrderedDict
+
+
+#Largest dynamic range (as a power of e) allowed for the running products inside one block;
+#keeps b/P well inside float64 range
+_LOG_RANGE = 300.0
+
+
+
+
+#Solves s_i = a_i * s_(i-1) + b_i along the last axis, with s_(-1) = init
+#>blocked closed form: inside a block s = P * (s_prev + cumsum(b / P)) with P the running product of a;
+# blocks are sized so that P cannot underflow, and only the block carries are chained in Python
+def _linear_recurrence(a, b, init):
+
+	n = a.shape[-1]
+	lead = a.shape[:-1]
+	a_min = float(np.min(a))
+
+	block = n if a_min >= 1.0 else max(1, min(n, int(_LOG_RANGE / -np.log(a_min))))
+	n_blocks = -(-n // block)
+	pad = n_blocks * block - n
+
+	if pad > 0:
+		a = np.concatenate([a, np.ones(lead + (pad,))], axis = -1)
+		b = np.concatenate([b, np.zeros(lead + (pad,))], axis = -1)
+
+	a = a.reshape(lead + (n_blocks, block))
+	b = b.reshape(lead + (n_blocks, block))
+
+	prod = np.cumprod(a, axis = -1)
+	local = prod * np.cumsum(b / prod, axis = -1)
+
+	out = np.empty_like(local)
+	carry = np.asarray(init, dtype = np.float64)
+
+	for k in range(n_blocks):
+
+		out[..., k, :] = local[..., k, :] + prod[..., k, :] * carry[..., None]
+		carry = out[..., k, -1]
+
+	return out.reshape(lead + (n_blocks * block,))[..., :n]
+
+#Repeats the last finite value over non-finite entries along the last axis; init is used before the first finite one
+def _carry_forward(x, finite, init):
+
+	idx = np.where(finite, np.arange(x.shape[-1]), -1)
+	idx = np.maximum.accumulate(idx, axis = -1)
+
+	filled = np.take_along_axis(x, np.maximum(idx, 0), axis = -1)
+	return np.where(idx >= 0, filled, np.asarray(init, dtype = np.float64)[..., None])
+
+
+
+
+#================ EMA SMOOTHING ====================
+#TensorBoard-like exponential moving average, vectorized over the last axis (1-D series or a 2-D batch).
+#Non-finite values (NaN/inf) do not update the average: the previous smoothed value is carried forward.
+#Without debias the average starts from the first value (0 if it is not finite), as the original slider did;
+#with debias it starts from 0 and is divided by 1 - weight^n, n being the number of finite values so far
+def ema(values, weight, debias = False):
+
+	x = np.asarray(values, dtype = np.float64)
+
+	if x.shape[-1] == 0:
+		return x.copy()
+
+	finite = np.isfinite(x)
+	lead = x.shape[:-1]
+
+	if debias:
+		init = np.zeros(lead)
+	else:
+		init = np.where(finite[..., 0], x[..., 0], 0.0)
+
+	if weight <= 0.0:
+
+		smoothed = _carry_forward(x, finite, init)
+
+	else:
+
+		a = np.where(finite, weight, 1.0)
+		b = np.where(finite, (1.0 - weight) * np.where(finite, x, 0.0), 0.0)
+
+		#Without debias the first point is the starting value itself
+		if not debias:
+			a[..., 0] = 1.0
+			b[..., 0] = 0.0
+
+		smoothed = _linear_recurrence(a, b, init)
+
+	if debias:
+
+		count = np.cumsum(finite, axis = -1)
+		factor = 1.0 - np.power(weight, count)
+		smoothed = np.where(factor > 0, smoothed / np.where(factor > 0, factor, 1.0), smoothed)
+
+	return smoothed
+
+#Smooths many series of different lengths at once, as a NaN-padded 2-D batch; returns one array per series
+def ema_batch(series, weight, debias = False):
+
+	series = [np.asarray(values, dtype = np.float64) for values in series]
+
+	if len(series) == 0:
+		return []
+
+	length = max(len(values) for values in series)
+
+	if length == 0:
+		return [values.copy() for values in series]
+
+	batch = np.full((len(series), length), np.nan)
+
+	for i, values in enumerate(series):
+		batch[i, :len(values)] = values
+
+	smoothed = ema(batch, weight, debias)
+
+	return [smoothed[i, :len(values)] for i, values in enumerate(series)]
+
+
+
+
+#================ SMOOTHING CACHE ====================
+#Bounded LRU cache of smoothed series, keyed by (data version, tag, weight, debias).
+#The data version identifies one state of a series' data (see LoadedScalar.data_version), so a change
+#in the data never hits old entries; discard() drops them right away
+class SmoothingCache:
+
+	def __init__(self, max_bytes = 256 * 1024**2):
+
+		self.max_bytes = max_bytes
+		self.entries = OrderedDict()
+		self.nbytes = 0
+
+	#Returns the smoothed series, computing and storing it on a miss
+	#>weights are rounded to 1e-3, so scrubbing the slider back and forth hits the same entries
+	def smooth(self, version, tag, values, weight, debias = False):
+
+		weight = round(float(weight), 3)
+		key = (version, tag, weight, debias)
+		smoothed = self.entries.get(key)
+
+		if smoothed is not None:
+			self.entries.move_to_end(key)
+			return smoothed
+
+		smoothed = ema(values, weight, debias)
+		smoothed.flags.writeable = False
+
+		self.entries[key] = smoothed
+		self.nbytes += smoothed.nbytes
+
+		while self.nbytes > self.max_bytes and len(self.entries) > 1:
+			_, evicted = self.entries.popitem(last = False)
+			self.nbytes -= evicted.nbytes
+
+		return smoothed
+
+	#Drops every entry of a data version
+	def discard(self, version):
+
+		for key in [key for key in self.entries if key[0] == version]:
+			self.nbytes -= self.entries.pop(key).nbytes
+
+	def clear(self):
+
+		self.entries.clear()
+		self.nbytes = 0
+
+
+#Cache shared by every plot
+smoothing_cache = SmoothingCache()
@@ -0,0 +1,93 @@
+import numpy as np
+
+from ranking import compute_scores, rank_keys, summarize_columns, Ranking, NO_DATA
+from scalar_data import ScalarSeries
+
+
+def series(values, steps = None):
+
+	values = np.asarray(values, dtype = np.float64)
+	return ScalarSeries(np.arange(len(values)) if steps is None else steps, values)
+
+
+def test_mean_last_matches_reference():
+
+	runs = [series(np.random.default_rng(i).normal(size = 50 + i)) for i in range(5)]
+	scores = compute_scores(runs, 'mean_last', last_n = 7)
+
+	np.testing.assert_allclose(scores, [run.value[-7:].mean() for run in runs])
+
+
+def test_mean_last_shorter_than_n():
+
+	scores = compute_scores([series([1.0, 3.0]), series([5.0])], 'mean_last', last_n = 10)
+
+	np.testing.assert_allclose(scores, [2.0, 5.0])
+
+
+#A NaN or inf in one run must not leak into the score of the runs after it
+def test_mean_last_non_finite_stays_in_its_run():
+
+	a = series([1.0, np.nan, 2.0, 4.0])
+	b = series([1.0, 2.0, 3.0])
+	c = series([np.inf, 1.0, 2.0])
+
+	scores = compute_scores([a, b], 'mean_last', last_n = 2)
+	np.testing.assert_allclose(scores, [3.0, 2.5])
+
+	scores = compute_scores([a, b], 'mean_last', last_n = 3)
+	assert np.isnan(scores[0])
+	assert scores[1] == 2.0
+
+	scores = compute_scores([c, b], 'mean_last', last_n = 1)
+	np.testing.assert_allclose(scores, [2.0, 3.0])
+
+
+def test_last_max_auc_threshold():
+
+	a = series([0.0, 2.0, 1.0], steps = np.array([0, 10, 20]))
+	b = series([5.0, -1.0], steps = np.array([0, 5]))
+
+	np.testing.assert_allclose(compute_scores([a, b], 'last'), [1.0, -1.0])
+	np.testing.assert_allclose(compute_scores([a, b], 'max'), [2.0, 5.0])
+	np.testing.assert_allclose(compute_scores([a, b], 'auc'), [25.0, 10.0])
+	np.testing.assert_allclose(compute_scores([a, b], 'threshold_step', threshold = 1.5), [10, 0])
+	np.testing.assert_allclose(compute_scores([a, b], 'threshold_step', threshold = 3.0), [NO_DATA, 0])
+
+
+def test_missing_series_get_no_data():
+
+	scores = compute_scores([None, series([]), series([1.0])], 'last')
+
+	np.testing.assert_allclose(scores, [NO_DATA, NO_DATA, 1.0])
+
+
+def test_threshold_ranks_earlier_crossing_first():
+
+	keys = rank_keys(np.array([30.0, NO_DATA, 10.0]), 'threshold_step')
+
+	assert list(np.argsort(keys)[::-1]) == [2, 0, 1]
+
+
+def test_ranking_order_puts_nan_last():
+
+	runs = [series([1.0, np.nan]), series([3.0]), series([2.0])]
+	indexes, scores = Ranking('last').order(runs, [0, 1, 2])
+
+	assert list(indexes) == [1, 2, 0]
+
+
+def test_summarize_columns():
+
+	columns = {
+		'tags': np.array(['a', 'b']),
+		'codes': np.array([0, 1, 0, 1, 0], dtype = np.int32),
+		'step': np.array([0, 0, 1, 1, 2], dtype = np.int64),
+		'value': np.array([1.0, 5.0, 3.0, 7.0, 2.0]),
+	}
+
+	summary = summarize_columns(columns)
+
+	assert summary['a']['count'] == 3 and summary['a']['last'] == 2.0 and summary['a']['max'] == 3.0
+	assert summary['b']['first_step'] == 0 and summary['b']['last_step'] == 1 and summary['b']['mean'] == 6.0
+	assert summary['a']['auc'] == 4.5
@@ -0,0 +1,85 @@
+import numpy as np
+
+from scalar_data import ScalarData
+from scalar_run import ScalarRun
+
+
+def columns(tags, codes, steps, values, offset = None):
+
+	columns = {
+		'tags': np.array(tags, dtype = str),
+		'codes': np.array(codes, dtype = np.int32),
+		'step': np.array(steps, dtype = np.int64),
+		'value': np.array(values, dtype = np.float64),
+	}
+
+	if offset is not None:
+		columns['offset'] = np.array(offset)
+
+	return columns
+
+
+def test_from_columns_groups_rows_by_tag():
+
+	data = ScalarData.from_columns(columns(['b [Point]', 'a'], [1, 0, 1, 0], [0, 0, 1, 1], [1.0, 2.0, 3.0, 4.0]))
+
+	assert data.tags == ['b [Point]', 'a']
+	assert list(data.get('a').step) == [0, 1]
+	assert list(data.get('a').value) == [1.0, 3.0]
+	assert list(data.get('b [Point]').value) == [2.0, 4.0]
+	assert data.point_tag == 'b [Point]'
+
+
+def test_from_columns_empty():
+
+	assert len(ScalarData.from_columns(None).tags) == 0
+	assert len(ScalarData.from_columns(columns(['a'], [], [], [])).tags) == 0
+
+
+def test_run_add_and_extend_scalars():
+
+	run = ScalarRun(columns(['a'], [0, 0], [0, 1], [1.0, 2.0], offset = 100), None, 'run', available_tags = ['a', 'b', 'c'])
+
+	assert run.offset == 100
+	assert run.missing_tags(['b', 'c']) == ['b', 'c']
+
+	run.add_scalars(columns(['a', 'b'], [0, 1], [0, 0], [9.0, 5.0]))
+
+	assert list(run.get_series('a').value) == [1.0, 2.0]
+	assert list(run.get_series('b').value) == [5.0]
+
+	#Rows of c are dropped since c is not loaded, d is a brand new tag, step 1 of a is a duplicate
+	run.extend_scalars(columns(['a', 'c', 'd'], [0, 0, 1, 2], [1, 2, 2, 2], [2.0, 3.0, 7.0, 8.0]))
+
+	assert list(run.get_series('a').value) == [1.0, 2.0, 3.0]
+	assert len(run.get_series('c')) == 0
+	assert list(run.get_series('d').value) == [8.0]
+	assert 'd' in run.available_tags
+
+
+def test_extend_keeps_the_sample_budget():
+
+	data = ScalarData.from_columns(columns(['a'], [0] * 10, range(10), range(10)))
+
+	for start in range(10, 1000, 10):
+		data.extend(ScalarData.from_columns(columns(['a'], [0] * 10, range(start, start + 10), range(start, start + 10))), max_samples = 50)
+
+	series = data.get('a')
+
+	assert len(series) == 50
+	assert series.step[0] == 0 and series.step[-1] == 999
+	assert np.all(np.diff(series.step) > 0)
+	np.testing.assert_array_equal(series.step, series.value)
+
+
+#A budget lowered after the load also trims the rows already in memory
+def test_extend_applies_a_lowered_budget():
+
+	data = ScalarData.from_columns(columns(['a'], [0] * 100, range(100), range(100)))
+	data.extend(ScalarData.from_columns(columns(['a'], [0] * 10, range(100, 110), range(100, 110))), max_samples = 20)
+
+	series = data.get('a')
+
+	assert len(series) == 20
+	assert series.step[0] == 0 and series.step[-1] == 109
+	assert np.all(np.diff(series.step) > 0)
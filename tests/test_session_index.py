@@ -0,0 +1,19 @@
+from session_index import SessionIndex, stat_key
+
+
+def test_summary_tags_follow_stored_summaries(tmp_path):
+
+	events = tmp_path / 'events'
+	events.write_bytes(b'')
+	index = SessionIndex(str(tmp_path), cache_dir = str(tmp_path / 'cache'))
+
+	assert index.summary_tags() == []
+
+	index.store_summary(str(events), stat_key(str(events)), {'b': {'last': 1.0}, 'a': {'last': 2.0}})
+	assert index.summary_tags() == ['a', 'b']
+
+	#A newer summary of the same file replaces its tags
+	index.store_summary(str(events), stat_key(str(events)), {'c': {'last': 3.0}})
+	assert index.summary_tags() == ['c']
+
+	index.close()
@@ -0,0 +1,55 @@
+import math
+
+import numpy as np
+
+from smoothing import ema, ema_batch
+
+
+#Per-point loop the vectorized EMA replaces; non-finite values carry the previous smoothed value
+def reference_ema(values, weight, debias = False):
+
+	last = 0.0 if debias or not math.isfinite(values[0]) else values[0]
+	count = 0
+	smoothed = []
+
+	for i, value in enumerate(values):
+
+		if math.isfinite(value) and (debias or i > 0):
+			last = last * weight + (1 - weight) * value
+
+		count += math.isfinite(value)
+		factor = 1 - weight ** count
+		smoothed.append(last / factor if debias and factor > 0 else last)
+
+	return smoothed
+
+
+def test_ema_matches_loop():
+
+	values = np.random.default_rng(0).normal(size = 1000)
+
+	for weight in (0.0, 0.6, 0.99, 0.9999):
+		np.testing.assert_allclose(ema(values, weight), reference_ema(values, weight), rtol = 1e-9, atol = 1e-12)
+		np.testing.assert_allclose(ema(values, weight, debias = True), reference_ema(values, weight, True), rtol = 1e-9, atol = 1e-12)
+
+
+def test_ema_carries_over_non_finite():
+
+	values = [np.nan, 1.0, np.inf, 3.0, np.nan]
+
+	np.testing.assert_allclose(ema(values, 0.5), reference_ema(values, 0.5))
+	np.testing.assert_allclose(ema(values, 0.0), [0.0, 1.0, 1.0, 3.0, 3.0])
+
+
+def test_ema_empty():
+
+	assert len(ema([], 0.5)) == 0
+
+
+def test_ema_batch_matches_single_series():
+
+	rng = np.random.default_rng(1)
+	series = [rng.normal(size = n) for n in (0, 1, 17, 300)]
+
+	for values, smoothed in zip(series, ema_batch(series, 0.9)):
+		np.testing.assert_allclose(smoothed, ema(values, 0.9))
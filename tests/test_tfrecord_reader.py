@@ -0,0 +1,146 @@
+import struct
+
+import numpy as np
+
+from tfrecord_reader import masked_crc32c, read_scalars, list_tags, sample_columns, EventsFileTail, Reservoir
+
+
+#Protobuf and TFRecord encoding of the few Event fields the reader decodes
+def varint(n):
+
+	out = bytearray()
+
+	while True:
+
+		byte = n & 0x7f
+		n >>= 7
+
+		if n:
+			out.append(byte | 0x80)
+		else:
+			out.append(byte)
+			return bytes(out)
+
+def field(number, wire, payload):
+
+	if wire == 2:
+		payload = varint(len(payload)) + payload
+
+	return varint(number << 3 | wire) + payload
+
+def event(step, tag, value, wall_time = 1.5):
+
+	summary_value = field(1, 2, tag.encode('utf-8')) + field(2, 5, struct.pack('<f', value))
+	return field(1, 1, struct.pack('<d', wall_time)) + field(2, 0, varint(step)) + field(5, 2, field(1, 2, summary_value))
+
+def record(data):
+
+	header = struct.pack('<Q', len(data))
+	return header + struct.pack('<I', masked_crc32c(header)) + data + struct.pack('<I', masked_crc32c(data))
+
+def write_events(path, rows):
+
+	with open(path, 'wb') as f:
+		for step, tag, value in rows:
+			f.write(record(event(step, tag, value)))
+
+
+def test_read_scalars_groups_rows_by_sorted_tag(tmp_path):
+
+	path = tmp_path / 'events'
+	write_events(path, [(0, 'b', 1.0), (0, 'a', 2.0), (1, 'b', 3.0), (1, 'a', 4.0)])
+
+	columns = read_scalars(str(path), check_crc = True)
+
+	assert list(columns['tags']) == ['a', 'b']
+	assert list(columns['codes']) == [0, 0, 1, 1]
+	assert list(columns['step']) == [0, 1, 0, 1]
+	assert list(columns['value']) == [2.0, 4.0, 1.0, 3.0]
+	assert columns['offset'] == path.stat().st_size
+
+
+def test_read_scalars_tag_selection(tmp_path):
+
+	path = tmp_path / 'events'
+	write_events(path, [(0, 'b', 1.0), (0, 'a', 2.0), (1, 'b', 3.0)])
+
+	columns = read_scalars(str(path), tags = ['b'])
+
+	assert list(columns['tags']) == ['b']
+	assert list(columns['value']) == [1.0, 3.0]
+	assert list_tags(str(path)) == ['a', 'b']
+
+
+def test_truncated_record_is_left_for_later(tmp_path):
+
+	path = tmp_path / 'events'
+	write_events(path, [(0, 'a', 1.0)])
+	complete = path.stat().st_size
+
+	with open(path, 'ab') as f:
+		f.write(record(event(1, 'a', 2.0))[:-6])
+
+	columns = read_scalars(str(path))
+
+	assert list(columns['step']) == [0]
+	assert columns['offset'] == complete
+
+
+def test_events_file_tail_only_returns_new_rows(tmp_path):
+
+	path = tmp_path / 'events'
+	write_events(path, [(0, 'a', 1.0)])
+
+	tail = EventsFileTail(str(path), offset = read_scalars(str(path))['offset'])
+	assert tail.poll() is None
+
+	with open(path, 'ab') as f:
+		f.write(record(event(1, 'a', 2.0)))
+		f.write(record(event(2, 'a', 3.0)))
+
+	columns = tail.poll()
+
+	assert list(columns['step']) == [1, 2]
+	np.testing.assert_array_equal(columns['value'], [2.0, 3.0])
+	assert tail.offset == path.stat().st_size
+
+
+def test_reservoir_keeps_first_and_last_in_order():
+
+	reservoir = Reservoir(10)
+
+	for i in range(1000):
+		reservoir.add(i)
+
+	assert len(reservoir.items) == 10
+	assert reservoir.items[0] == 0
+	assert reservoir.items[-1] == 999
+	assert reservoir.items == sorted(reservoir.items)
+
+
+def test_reservoir_is_deterministic():
+
+	first, second = Reservoir(10), Reservoir(10)
+
+	for i in range(1000):
+		first.add(i)
+		second.add(i)
+
+	assert first.items == second.items
+
+
+def test_max_samples_caps_rows_per_tag(tmp_path):
+
+	path = tmp_path / 'events'
+	write_events(path, [(step, tag, float(step)) for step in range(200) for tag in ('a', 'b')])
+
+	columns = read_scalars(str(path), max_samples = 20)
+
+	assert list(np.bincount(columns['codes'])) == [20, 20]
+	assert list(columns['step'][[0, 19, 20, 39]]) == [0, 199, 0, 199]
+
+	#The tbparse fallback samples the same rows
+	full = read_scalars(str(path))
+	sampled = sample_columns(full, 20)
+
+	np.testing.assert_array_equal(sampled['step'], columns['step'])
@@ -1,20 +1,23 @@
 import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 import re
-from functools import partial
 import datetime
-import numpy as np
 import copy
+import queue
 
 #GUI
 import tkinter as tk
 from tkinter import ttk
+#Dialogs are submodules; they used to be loaded as a side effect of importing matplotlib's Tk backend
+import tkinter.messagebox
+import tkinter.filedialog
 
 #local imports
 from loaded_scalar import LoadedScalar
-from sessionloader import SessionLoader
+from ranking import Ranking, NO_DATA
+from sessionloader import SessionLoader, LoadJob, LiveTail, get_pool, shutdown_pool
 from scalar_widgets import ScrollableFrame, PlotHandler
-from toplevels import InfoWindow, SelectScalarWin, Preferences
+from toplevels import SelectScalarWin, Preferences
 
 
 
@@ -22,10 +25,9 @@ from toplevels import InfoWindow, SelectScalarWin, Preferences
 #Main application class
 class TFReaderWin(tk.Tk):
 
-	def __init__(self, workdir):
+	def __init__(self, workdir, max_samples = None):
 
 		#Main window initialization
-		self.running = True
 		tk.Tk.__init__(self)
 		tk.Tk.wm_title(self, "TF Reader")
 		self.tk.call("source", "azure.tcl")
@@ -45,8 +47,21 @@ class TFReaderWin(tk.Tk):
 		self.config_menu = tk.Menu(self.menu_bar, tearoff = 0)
 		self.config_menu.add_command(label = "Preferences", command = self.preferences_bringup)
 
+		#Live mode; follows the events files of the loaded scalars and appends new points
+		self.live_mode = tk.BooleanVar(value = False)
+		self.live_tail = None
+		self.config_menu.add_checkbutton(label = "Live update", variable = self.live_mode, command = self.toggle_live)
+
 		self.order_choice = None		
 
+		#Metric the loaded scalars are ranked on (labels order and exports)
+		self.ranking = Ranking()
+
+		#Only decode the tags needed by plots and label ordering; the others are loaded when requested
+		#>off by default: it needs a listing pass over every events file first, and with the scalar cache
+		# every tag is decoded anyway, so it only saves memory (enabled from Preferences)
+		self.selective_loading = False
+
 		self.menu_bar.add_cascade(labe = "File", menu = self.file_menu)
 		self.menu_bar.add_cascade(labe = "Config", menu = self.config_menu)
 
@@ -62,9 +77,12 @@ class TFReaderWin(tk.Tk):
 		self.save_butt.grid(row = 0, column = 2, pady = 30, sticky = "SE", padx = (20, 20))
 
 		#SessionLoader; handles workdir scanning and file loading/parsing
-		self.loader = SessionLoader(workdir)
+		#>max_samples caps the points kept per tag while decoding (None keeps them all)
+		self.loader = SessionLoader(workdir, max_samples = max_samples)
 		self.loader.parse_sessions()
-		self.loader.update_size_dict()
+
+		#Start the loader workers now, so they are warm when the first scalar is requested
+		get_pool()
 
 		#Model choice variables
 		self.available_models = copy.copy(self.loader.model_tags)
@@ -95,6 +113,9 @@ class TFReaderWin(tk.Tk):
 		#Toplevel variable; used to only allow one additional window at a time
 		self.toplevel = None		
 
+		#Pending update_gui() call, if any; see request_gui_update()
+		self.gui_update = None
+
 		#Model tag choice variables initialization
 		self.tags = [""]
 		self.full_tags = [""]
@@ -113,15 +134,39 @@ class TFReaderWin(tk.Tk):
 		self.slider_label = ttk.Label(self, text = "Smooth Value:")
 		self.slider_label.grid(row = 0, column = 2, sticky = "NE", pady = 20, padx = (0,200))
 		self.slider = ttk.Scale(self, from_ = 0.0, to = 0.99, variable = self.smooth_value,
-						orient = tk.HORIZONTAL, command = self.update_plot, length = 200)
+						orient = tk.HORIZONTAL, command = self.on_smooth_change, length = 200)
 		self.slider.grid(row = 0, column = 2, sticky = "NE", pady = 60, padx = (0,70))
 
+		#Background loading status: progress bar and Cancel button, only shown while loading
+		self.load_job = None
+
+		#Background loads of tags missing from runs already loaded; (job, {scalar: tags requested})
+		self.tag_jobs = []
+
+		self.load_errors = False
+		self.load_done = 0
+		self.load_listed = None
+		self.load_total = 0
+		self.known_tags = set()
+
+		self.status_frame = ttk.Frame(self)
+		self.status_frame.grid(row = 1, column = 0, columnspan = 3, sticky = "EW", padx = 10, pady = (0, 5))
+		self.progress_label = ttk.Label(self.status_frame, text = "")
+		self.progress_label.grid(row = 0, column = 0, padx = (0, 10))
+		self.progress = ttk.Progressbar(self.status_frame, orient = tk.HORIZONTAL, length = 300, mode = 'determinate')
+		self.progress.grid(row = 0, column = 1, padx = (0, 10))
+		self.cancel_button = ttk.Button(self.status_frame, text = "Cancel", command = self.cancel_loading)
+		self.cancel_button.grid(row = 0, column = 2)
+		self.status_frame.grid_remove()
+
 		#Bind resizing function
 		self.bind("<Configure>", self.on_resize) 
 		self.previous_size = (950, 650)
 
 		#Attempt a first resize to inizialize some values      
+		self.update()
 		self.on_resize(None)
+		self.request_gui_update()
  
 
 
@@ -135,7 +180,7 @@ class TFReaderWin(tk.Tk):
 
 		for scalar in LoadedScalar.get_loaded_scalars():		
 
-			for tag in scalar.scalar['tag']:
+			for tag in scalar.available_tags:
 
 				short_tag = tag[7:-1]
 
@@ -162,16 +207,27 @@ class TFReaderWin(tk.Tk):
 		return (int(sizes[0]), int(sizes[1]))
 
 	#===========TK WINDOW FUNCTIONS===========
-	#Used when quitting main window; self.running is used to stop the main loop
+	#Used when quitting main window; quitting ends mainloop()
 	def on_destroy(self):
 		if tk.messagebox.askokcancel("Quit", "Do you want to quit?"):
+			if self.live_tail is not None:
+				self.live_tail.stop()
+			shutdown_pool()
 			self.destroy()
 			self.quit()
-			self.running = False
 
-	#Just a convenient gruping for tkinter update functions; to be used instead of mainloop()
+	#Schedules update_gui() for the next time Tk is idle; called whenever the session entries or the plots change
+	#>requests made before the update runs are coalesced in a single one, so the app does no work while nothing changes
+	def request_gui_update(self):
+
+		if self.gui_update is None:
+			self.gui_update = self.after_idle(self.update_gui)
+
+	#Just a convenient gruping for the updates following a state change
 	def update_gui(self):
 
+		self.gui_update = None
+
 		#Check if new scalars are added to update tags choice menu entries
 		if self.loader.entries_update:
 			self.update_menu_entries()
@@ -187,14 +243,11 @@ class TFReaderWin(tk.Tk):
 				self.update_plot(self.get_smooth_value)
 				self.plot_container.need_to_update = False
 				self.update_scalar_labels()
-		self.update_idletasks()
-		self.update()
 
 	#Calls the PlotHandler resize function and resizes Scrollable Frame
+	#>the window geometry is already current inside <Configure>; the plots are resized by the redraw scheduler
 	def on_resize(self, event):
 
-		#Update to get the current values
-		self.update()
 		curr_size = (self.winfo_width(), self.winfo_height())
 
 		if self.previous_size != curr_size:
@@ -215,6 +268,13 @@ class TFReaderWin(tk.Tk):
 			scalars[0].label.remove_lines()
 
 		self.plot_container.flush_tags()
+		self.known_tags = set()
+
+	#Slider callback; the plot update is coalesced by the redraw scheduler, so dragging renders at most once per frame
+	def on_smooth_change(self, smooth_value):
+
+		self.smooth_value_label.config(text = f'{self.get_smooth_value:.2f}')
+		self.plot_container.request_update(self.get_smooth_value)
 
 	#Standard plot update method: redraws the plot and updates existing scalar label's line variable
 	def update_plot(self, smooth_value):
@@ -230,11 +290,7 @@ class TFReaderWin(tk.Tk):
 	#Updates the labes by destroying and recreating according to the scalars
 	def update_scalar_labels(self):
 
-		max_values = [scalar.get_max(self.order_choice) for scalar in LoadedScalar.get_loaded_scalars()]
-		indexes = np.argsort(max_values)[::-1]
-
-		loaded_scalars = LoadedScalar.get_loaded_scalars()
-		loaded_scalars = [loaded_scalars[i] for i in indexes]
+		loaded_scalars, _ = self.ranked_scalars()
 
 		for i, scalar in enumerate(loaded_scalars):
 
@@ -243,6 +299,11 @@ class TFReaderWin(tk.Tk):
 
 			scalar.label.on_leave(None)
 
+	#Loaded scalars ordered by the ranking metric on the ordering tag, best first, with their scores
+	def ranked_scalars(self):
+
+		return self.ranking.rank(LoadedScalar.get_loaded_scalars(), self.order_choice)
+
 	#Updtaes OptionMenu entries
 	def update_menu_entries(self):
 
@@ -296,6 +357,8 @@ class TFReaderWin(tk.Tk):
 		if tmp == -1:
 			tk.messagebox.showerror("Error", "The selected folder does not contain a valid scalar.")
 
+		self.request_gui_update()
+
 	#Bringup for path asking window; used to load external tag folder (multiple trainings that only differ net sizes)
 	def add_tag_dir_bringup(self):
 
@@ -311,6 +374,8 @@ class TFReaderWin(tk.Tk):
 
 			tk.messagebox.showerror("Error", "The selected folder is not a valid tag directory.")
 
+		self.request_gui_update()
+
 		#SessionLoader.generate_session() returns -1 in case of any failure
 		# while preprocessing data
 
@@ -327,43 +392,303 @@ class TFReaderWin(tk.Tk):
 
 
 	#======================LOAD FUNCTIONS =====================================
-	#Load scalar from selected session(s) and update plot
-	def append_scalar(self):
+	#Tags used to order the scalar labels
+	def order_tags(self, available):
+
+		if self.order_choice == None:
+
+			return [tag for tag in available if "Avg" in tag and "Network" in tag and "Test" in tag and not "Best" in tag]
+
+		if '(3)' in self.order_choice:
+
+			return [self.order_choice.strip(' (3)') + ' - 1:']
+
+		return [self.order_choice]
+
+	#Tags needed by the current plots, the [Point] markers and the label ordering
+	def required_tags(self, available):
+
+		tags = set()
+
+		for plot in self.plot_container.plots:
+
+			choice = plot.scalar_choice
+			tags.update(choice if type(choice) == list else [choice])
+
+		tags.update(tag for tag in available if '[Point]' in tag)
+		tags.update(self.order_tags(available))
+
+		return tags
+
+	#Loads the given tags in the background for the loaded scalars that have them but did not load them yet
+	#>tags already being loaded for a scalar are not requested again; results are added by poll_tag_jobs()
+	def ensure_tags(self, tags):
+
+		tags = tags if type(tags) == list else [tags]
+		pending = {}
+
+		for scalar in LoadedScalar.get_loaded_scalars():
+
+			if scalar.session is None:
+				continue
+
+			loading = set(tag for _, requested in self.tag_jobs for tag in requested.get(scalar, ()))
+			missing = set(scalar.missing_tags(tags)) - loading
+
+			if len(missing) > 0:
+				pending[scalar] = missing
+
+		if len(pending) == 0:
+			return
+
+		missing = set(tag for scalar_tags in pending.values() for tag in scalar_tags)
+		job = LoadJob(self.loader, [scalar.session for scalar in pending], tags = missing)
+
+		self.tag_jobs.append((job, pending))
+		job.start()
+
+		if len(self.tag_jobs) == 1:
+			self.after(50, self.poll_tag_jobs)
+
+	#Adds the tags loaded by the background tag jobs to their scalars and redraws
+	def poll_tag_jobs(self):
+
+		changed = False
+		error = None
+
+		for job, pending in list(self.tag_jobs):
+
+			finished = False
+
+			while True:
+
+				try:
+					message = job.queue.get_nowait()
+				except queue.Empty:
+					break
+
+				if message[0] == 'loaded':
+
+					_, session, scalar, _ = message
+
+					for loaded in pending:
+
+						if loaded.session is session:
+							loaded.add_scalars(scalar)
+							changed = True
+
+				else:
+
+					finished = True
+					error = message[1] if message[1] is not None else error
+
+			if finished:
+				self.tag_jobs.remove((job, pending))
 
-		#Trigger to remove corrupted or invalid scalars
-		raise_err = False
-		to_remove = []
+		if changed:
+			self.refresh_loaded_scalars()
 
-		#Retrieve [scalars, scalar_name, params] from SessionLoader
-		scalar_iter = self.loader.get_scalar_from_tags(self.model_choice.get(), self.reward_choice.get(), self.get_size_choice[1], self.get_size_choice[0])
-		
-		#Update scalar related variables      
-		for tmp in scalar_iter:           
-			
-			if 'tag' in tmp[0].keys():
+		if len(self.tag_jobs) > 0:
+			self.after(50, self.poll_tag_jobs)
 
-				scalar, name, params = tmp    
-				fns = [plot.fast_update for plot in self.plot_container.plots]
-				new_scalar = LoadedScalar(scalar, params, name, self.scalar_container.scrollable_frame, fns)
+		if error is not None:
+			tk.messagebox.showerror("Error", f"Loading failed: {error}")
+
+	#Load scalar from selected session(s) in the background; results are added by poll_loading()
+	#>sessions overrides the model/reward/size selection (e.g. sessions ranked on their summaries)
+	def append_scalar(self, sessions = None):
+
+		#One load at a time
+		if self.load_job is not None:
+			return -1
+
+		if sessions is None:
+			sessions = self.loader.select_sessions(self.model_choice.get(), self.reward_choice.get(), self.get_size_choice[1], self.get_size_choice[0])
+
+		self.load_job = LoadJob(self.loader, sessions, self.required_tags if self.selective_loading else None)
+		self.load_errors = False
+		self.load_done = 0
+		self.load_listed = None
+		self.load_total = len(sessions)
+
+		#Show progress and Cancel button
+		self.add_scalar_button.state(["disabled"])
+		self.progress.config(maximum = max(1, self.load_total), value = 0)
+		self.progress_label.config(text = f"Loading 0/{self.load_total}")
+		self.cancel_button.state(["!disabled"])
+		self.status_frame.grid()
+
+		self.load_job.start()
+		self.after(50, self.poll_loading)
+
+		return 0
+
+	#Stops the running load; sessions already loaded are kept
+	def cancel_loading(self):
+
+		if self.load_job is not None:
+
+			self.load_job.cancel()
+			self.cancel_button.state(["disabled"])
+			self.progress_label.config(text = "Cancelling...")
+
+	#Collects the scalars loaded so far by the background job and adds them to the plots
+	def poll_loading(self):
+
+		if self.load_job is None:
+			return
+
+		new_scalars = False
+		finished = False
+		error = None
+
+		while True:
+
+			try:
+				message = self.load_job.queue.get_nowait()
+			except queue.Empty:
+				break
+
+			if message[0] == 'listing':
+
+				self.load_listed = message[1]
+
+			elif message[0] == 'loaded':
+
+				_, session, scalar, listing = message
+				self.load_done += 1
+
+				if self.load_job.cancelled.is_set():
+					continue
+
+				#Update scalar related variables
+				if (scalar is not None and len(scalar['step']) > 0) or (listing is not None and len(listing) > 0):
+
+					name, params = self.loader.get_name(session), session.params[0]
+					fns = [plot.fast_update for plot in self.plot_container.plots]
+					new_scalar = LoadedScalar(scalar, params, name, self.scalar_container.scrollable_frame, fns, session, listing)
+					self.follow_scalar(new_scalar)
+					new_scalars = True
+
+					#Activate save button
+					self.save_butt.state(["!disabled"])
+
+				else:
+
+					#Corrupted or invalid scalar
+					self.load_errors = True
 
 			else:
 
-				raise_err = True       
- 
-			#Activate save button
-			self.save_butt.state(["!disabled"])                   
+				finished = True
+				error = message[1]
+
+		#Update plot with the runs loaded since the last poll
+		#>the job decoded the tags required when it started; plots added since then get theirs from a tag job
+		if new_scalars:
+
+			self.refresh_loaded_scalars()
+
+			available = set(tag for scalar in LoadedScalar.get_loaded_scalars() for tag in scalar.available_tags)
+			self.ensure_tags(list(self.required_tags(available)))
 
+		if not finished:
+
+			#The listing pass of a tag-selective load comes before any session is loaded
+			if self.load_listed is not None and self.load_listed < self.load_total and self.load_done == 0:
+				value, text = self.load_listed, f"Listing tags {self.load_listed}/{self.load_total}"
+			else:
+				value, text = self.load_done, f"Loading {self.load_done}/{self.load_total}"
+
+			self.progress.config(value = value)
+			if not self.load_job.cancelled.is_set():
+				self.progress_label.config(text = text)
+
+			self.after(50, self.poll_loading)
+			return
+
+		#Load finished; hide progress
+		self.load_job = None
+		self.status_frame.grid_remove()
+		self.add_scalar_button.state(["!disabled"])
+
+		if error is not None:
+			tk.messagebox.showerror("Error", f"Loading failed: {error}")
+
+		elif self.load_errors:
+			tk.messagebox.showerror("Error", "Some scalars have invalid data")
+
+	#======================LIVE MODE =====================================
+	#Starts or stops following the loaded scalars' events files
+	def toggle_live(self):
+
+		if self.live_mode.get() and self.live_tail is None:
+
+			self.live_tail = LiveTail()
+
+			for scalar in LoadedScalar.get_loaded_scalars():
+				self.follow_scalar(scalar)
+
+			self.live_tail.start()
+			self.after(1000, self.poll_live)
+
+		elif not self.live_mode.get() and self.live_tail is not None:
+
+			self.live_tail.stop()
+			self.live_tail = None
+
+	#Registers a loaded scalar with the live tail, if live mode is on and its byte offset is known
+	def follow_scalar(self, scalar):
+
+		if self.live_tail is not None and scalar.session is not None and scalar.offset is not None:
+			self.live_tail.follow(scalar.session.tf_events_path, scalar.offset, scalar.available_tags)
+
+	#Appends the points written since the last poll and redraws
+	def poll_live(self):
+
+		if self.live_tail is None:
+			return
+
+		changed = False
+
+		while True:
+
+			try:
+				_, path, scalar = self.live_tail.queue.get_nowait()
+			except queue.Empty:
+				break
+
+			followers = [loaded for loaded in LoadedScalar.get_loaded_scalars() if loaded.session is not None and loaded.session.tf_events_path == path]
+
+			#The scalar has been removed in the meantime
+			if len(followers) == 0:
+				self.live_tail.unfollow(path)
+
+			for loaded in followers:
+				loaded.extend_scalars(scalar, self.loader.max_samples)
+				changed = True
+
+		if changed:
+			self.refresh_loaded_scalars()
+
+		self.after(1000, self.poll_live)
+
+	#Redraws plots, labels and tag choices after scalars have been added
+	def refresh_loaded_scalars(self):
 
-		#Update plot
 		if self.plot_container is not None:
 
 			self.update_plot(self.get_smooth_value)
 			self.update_scalar_labels()
-			self.get_tags()
-			self.plot_container.update_tags(self.tags, self.full_tags)
 
+			#Only refresh tag choices when new tags showed up, so that the current choice is kept
+			known_tags = set(tag for scalar in LoadedScalar.get_loaded_scalars() for tag in scalar.available_tags)
+
+			if known_tags != self.known_tags:
 
-		return -1 if raise_err else 0
+				self.known_tags = known_tags
+				self.get_tags()
+				self.plot_container.update_tags(self.tags, self.full_tags)
 
 
 	#======================SAVE FUNCTIONS =====================================
@@ -384,22 +709,22 @@ class TFReaderWin(tk.Tk):
 		file_path = tk.filedialog.asksaveasfilename(parent = self, initialdir = filepath, initialfile = filename, 
 					filetypes=(("Text files", "*.txt"), ("All files", "*.*")), defaultextension = '.txt')
 	  
-		loaded_scalars = LoadedScalar.get_loaded_scalars()
-		max_values = [scalar.get_max(self.order_choice) for scalar in LoadedScalar.get_loaded_scalars()]
-		indexes = np.argsort(max_values)[::-1]
+		loaded_scalars, scores = self.ranked_scalars()
 
 		if len(loaded_scalars) > 1:
 
 			with open(file_path, 'w') as f:
 
-				criterion = "Max Test Avg:" if self.order_choice == None else f'Max {self.order_choice}'
+				#The default metric keeps the historical 'Max' criterion
+				prefix = "Max" if self.ranking.metric == 'last' else self.ranking.label
+				criterion = f"{prefix} Test Avg:" if self.order_choice == None else f'{prefix} {self.order_choice}'
 
 				#Write relevant infos
 				f.write("Scalars Plotted:\n")      
-				for i in indexes:
+				for scalar, score in zip(loaded_scalars, scores):
 
-					name = loaded_scalars[i].scalar_name.split('\n')
-					max_value = loaded_scalars[i].max_value if loaded_scalars[i].max_value != -1000 else "NO DATA"
+					name = scalar.scalar_name.split('\n')
+					max_value = score if score != NO_DATA else "NO DATA"
 
 					f.write(f'{name[0]}|{name[1]}  			 {criterion} {max_value}\n')
 
@@ -0,0 +1,647 @@
+import os
+import re
+import struct
+import random
+from array import array
+import numpy as np
+
+
+#Protobuf wire types
+_VARINT, _FIXED64, _LEN, _FIXED32 = 0, 1, 2, 5
+
+#TensorFlow DataType values that can hold a scalar we care about
+_DT_FLOAT, _DT_DOUBLE, _DT_INT32, _DT_INT64, _DT_HALF = 1, 2, 3, 9, 19
+_DT_FORMATS = {_DT_FLOAT: '<f', _DT_DOUBLE: '<d', _DT_INT32: '<i', _DT_INT64: '<q', _DT_HALF: '<e'}
+
+#SummaryMetadata.DataClass.DATA_CLASS_SCALAR
+_DATA_CLASS_SCALAR = 1
+
+_unpack_len = struct.Struct('<Q').unpack_from
+_unpack_u32 = struct.Struct('<I').unpack_from
+_unpack_f32 = struct.Struct('<f').unpack_from
+_unpack_f64 = struct.Struct('<d').unpack_from
+
+
+
+
+#==================== CRC32C ====================
+#Castagnoli CRC used by the TFRecord framing; only the 8-byte length header is checked by default
+_CRC_TABLE = []
+
+for _i in range(256):
+
+	_crc = _i
+	for _ in range(8):
+		_crc = (_crc >> 1) ^ 0x82F63B78 if _crc & 1 else _crc >> 1
+
+	_CRC_TABLE.append(_crc)
+
+def crc32c(data):
+
+	crc = 0xFFFFFFFF
+	table = _CRC_TABLE
+
+	for byte in data:
+		crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+
+	return crc ^ 0xFFFFFFFF
+
+#TFRecord masked CRC
+def masked_crc32c(data):
+
+	crc = crc32c(data)
+	return (((crc >> 15) | (crc << 17)) + 0xA282EAD8) & 0xFFFFFFFF
+
+
+
+
+#==================== PROTOBUF HELPERS ====================
+#Decodes a varint starting at pos; returns (value, new_pos)
+def _varint(buf, pos):
+
+	b = buf[pos]
+	if b < 0x80:
+		return b, pos + 1
+
+	result = b & 0x7F
+	shift = 7
+	pos += 1
+
+	while True:
+
+		b = buf[pos]
+		result |= (b & 0x7F) << shift
+		pos += 1
+
+		if b < 0x80:
+			return result, pos
+
+		shift += 7
+
+#Skips a field of the given wire type; returns the new position
+def _skip(buf, pos, wire):
+
+	if wire == _VARINT:
+		return _varint(buf, pos)[1]
+	if wire == _FIXED64:
+		return pos + 8
+	if wire == _LEN:
+		length, pos = _varint(buf, pos)
+		return pos + length
+	if wire == _FIXED32:
+		return pos + 4
+
+	raise ValueError(f'Unsupported wire type {wire}')
+
+#Returns the plugin name and data class from a SummaryMetadata message
+def _parse_metadata(buf, pos, end):
+
+	plugin_name = None
+	data_class = 0
+
+	while pos < end:
+
+		key, pos = _varint(buf, pos)
+		field, wire = key >> 3, key & 7
+
+		if field == 1 and wire == _LEN:
+
+			#PluginData: only its plugin_name is needed
+			length, pos = _varint(buf, pos)
+			sub_end = pos + length
+
+			while pos < sub_end:
+
+				key, pos = _varint(buf, pos)
+
+				if key == (1 << 3 | _LEN):
+					length, pos = _varint(buf, pos)
+					plugin_name = bytes(buf[pos:pos+length]).decode('utf-8', 'replace')
+					pos += length
+				else:
+					pos = _skip(buf, pos, key & 7)
+
+		elif field == 4 and wire == _VARINT:
+			data_class, pos = _varint(buf, pos)
+
+		else:
+			pos = _skip(buf, pos, wire)
+
+	return plugin_name, data_class
+
+#Returns the value of a scalar TensorProto, or None if the tensor is not a scalar
+def _parse_scalar_tensor(buf, pos, end):
+
+	dtype = 0
+	content = None
+	typed = None
+	num_elements = 1
+
+	while pos < end:
+
+		key, pos = _varint(buf, pos)
+		field, wire = key >> 3, key & 7
+
+		if field == 1 and wire == _VARINT:
+			dtype, pos = _varint(buf, pos)
+
+		#TensorShapeProto: every dim must have size 1
+		elif field == 2 and wire == _LEN:
+
+			length, pos = _varint(buf, pos)
+			sub_end = pos + length
+
+			while pos < sub_end:
+
+				key, pos = _varint(buf, pos)
+
+				if key == (2 << 3 | _LEN):
+
+					length, pos = _varint(buf, pos)
+					dim_end = pos + length
+
+					while pos < dim_end:
+
+						key, pos = _varint(buf, pos)
+
+						if key == (1 << 3 | _VARINT):
+							size, pos = _varint(buf, pos)
+							num_elements *= size
+						else:
+							pos = _skip(buf, pos, key & 7)
+
+				else:
+					pos = _skip(buf, pos, key & 7)
+
+		elif field == 4 and wire == _LEN:
+			length, pos = _varint(buf, pos)
+			content = (pos, pos + length)
+			pos += length
+
+		#float_val / double_val, packed or not
+		elif field == 5 or field == 6:
+
+			fmt = _unpack_f32 if field == 5 else _unpack_f64
+
+			if wire == _LEN:
+				length, pos = _varint(buf, pos)
+				if length > 0:
+					typed = fmt(buf, pos)[0]
+				pos += length
+			else:
+				typed = fmt(buf, pos)[0]
+				pos += 4 if field == 5 else 8
+
+		#int_val / int64_val / half_val (stored as varints), packed or not
+		elif field in (7, 10, 13):
+
+			if wire == _LEN:
+				length, pos = _varint(buf, pos)
+				if length > 0:
+					value = _varint(buf, pos)[0]
+				pos += length
+			else:
+				value, pos = _varint(buf, pos)
+
+			if field == 13:
+				typed = struct.unpack('<e', struct.pack('<H', value & 0xFFFF))[0]
+			else:
+				#Two's complement for negative ints
+				typed = value - (1 << 64) if value >= (1 << 63) else value
+
+		else:
+			pos = _skip(buf, pos, wire)
+
+	if num_elements != 1 or dtype not in _DT_FORMATS:
+		return None
+
+	if content is not None:
+
+		fmt = _DT_FORMATS[dtype]
+		if content[1] - content[0] < struct.calcsize(fmt):
+			return None
+
+		return float(struct.unpack_from(fmt, buf, content[0])[0])
+
+	return float(typed) if typed is not None else None
+
+
+
+
+#Builds a tag predicate from a tag selection
+#>None selects everything, a string or compiled pattern is used as a regex (search), any other iterable as a set of tags
+def tag_filter(tags):
+
+	if tags is None:
+		return None
+
+	if isinstance(tags, str):
+		tags = re.compile(tags)
+
+	if isinstance(tags, re.Pattern):
+		return lambda tag: tags.search(tag) is not None
+
+	tags = frozenset(tags)
+	return lambda tag: tag in tags
+
+
+
+
+#==================== RESERVOIR ====================
+#Fixed size sample of a stream, after TensorBoard's reservoir (size guidance).
+#The first item is never replaced and the last slot always holds the latest item, so a sampled series
+#keeps its first and last step; items stay in stream order. A fixed seed makes the sample deterministic.
+class Reservoir:
+
+	def __init__(self, size, seed = 0):
+
+		self.size = max(int(size), 2)
+		self.items = []
+		self.seen = 0
+		self.random = random.Random(seed)
+
+	def add(self, item):
+
+		self.seen += 1
+
+		if len(self.items) < self.size:
+			self.items.append(item)
+			return
+
+		r = self.random.randint(1, self.seen - 1)
+
+		if r < self.size:
+			self.items.pop(r)
+			self.items.append(item)
+		else:
+			self.items[-1] = item
+
+
+
+
+#==================== TFRECORD SCALAR READER ====================
+#Streaming reader for tf_events files that only decodes scalar summaries.
+#Walks the TFRecord framing and the Event/Summary protobufs by hand: simple_value and scalar tensor
+#values are decoded, every other record or field (histograms, images, graphs...) is skipped by offset.
+#Results are accumulated in typed arrays and returned as columns (see ScalarCache for the layout).
+#>tags restricts decoding to a tag selection (see tag_filter); values = False only collects the scalar tags
+class TFRecordScalarReader:
+
+	def __init__(self, path, check_crc = False, tags = None, values = True, max_samples = None):
+
+		self.path = path
+		self.check_crc = check_crc
+		self.decode_values = values
+
+		#Per tag sample budget; rows go through one reservoir per tag instead of being all kept
+		self.max_samples = max_samples if max_samples else None
+		self.reservoirs = {}
+
+		#Tag selection; decisions are memoized on the raw tag bytes
+		self.tag_filter = tag_filter(tags)
+		self.selected = {}
+
+		#Tag dictionary; code -> tag and raw tag -> code
+		self.tags = []
+		self.tag_codes = {}
+
+		#Tags declared as scalars through their tensor metadata (only written with the first event)
+		self.scalar_tensor_tags = set()
+
+		#Bytes consumed so far; always the end of the last complete record
+		self.offset = 0
+
+		#Output columns
+		self.codes = array('i')
+		self.steps = array('q')
+		self.values = array('d')
+		self.wall_times = array('d')
+
+	#Returns the code for a raw tag, adding it to the dictionary if new
+	def _code(self, raw_tag):
+
+		code = self.tag_codes.get(raw_tag)
+
+		if code is None:
+			code = len(self.tags)
+			self.tag_codes[raw_tag] = code
+			self.tags.append(raw_tag.decode('utf-8', 'replace'))
+
+		return code
+
+	#Whether a raw tag belongs to the selection
+	def _is_selected(self, raw_tag):
+
+		selected = self.selected.get(raw_tag)
+
+		if selected is None:
+			selected = self.tag_filter is None or self.tag_filter(raw_tag.decode('utf-8', 'replace'))
+			self.selected[raw_tag] = selected
+
+		return selected
+
+	#Reads the whole file and returns its scalar columns
+	#>the columns also carry the byte offset consumed, so that a later tail can resume from there
+	def read(self):
+
+		with open(self.path, 'rb') as f:
+			self.read_records(f)
+
+		columns = self.columns()
+		columns['offset'] = self.offset
+		return columns
+
+	#Reads records from an open file until EOF or a truncated record
+	#>returns the offset right after the last complete record
+	def read_records(self, f):
+
+		offset = f.tell()
+
+		while True:
+
+			header = f.read(12)
+
+			if len(header) < 12:
+				break
+
+			length = _unpack_len(header)[0]
+
+			if _unpack_u32(header, 8)[0] != masked_crc32c(header[:8]):
+				raise IOError(f'Corrupted record length in {self.path} at offset {offset}')
+
+			data = f.read(length)
+			footer = f.read(4)
+
+			#Truncated record; the writer is probably mid-flush
+			if len(data) < length or len(footer) < 4:
+				break
+
+			if self.check_crc and _unpack_u32(footer)[0] != masked_crc32c(data):
+				raise IOError(f'Corrupted record in {self.path} at offset {offset}')
+
+			self._parse_event(memoryview(data))
+			offset += 16 + length
+
+		f.seek(offset)
+		self.offset = offset
+		return offset
+
+	#Event: keeps wall_time and step and hands the summary to _parse_summary
+	def _parse_event(self, buf):
+
+		pos = 0
+		end = len(buf)
+		wall_time = 0.0
+		step = 0
+		summary = None
+
+		while pos < end:
+
+			key, pos = _varint(buf, pos)
+			field, wire = key >> 3, key & 7
+
+			if field == 1 and wire == _FIXED64:
+				wall_time = _unpack_f64(buf, pos)[0]
+				pos += 8
+
+			elif field == 2 and wire == _VARINT:
+				step, pos = _varint(buf, pos)
+				if step >= (1 << 63):
+					step -= (1 << 64)
+
+			elif field == 5 and wire == _LEN:
+				length, pos = _varint(buf, pos)
+				summary = (pos, pos + length)
+				pos += length
+
+			else:
+				pos = _skip(buf, pos, wire)
+
+		if summary is not None:
+			self._parse_summary(buf, summary[0], summary[1], step, wall_time)
+
+	#Summary: iterates over its values
+	def _parse_summary(self, buf, pos, end, step, wall_time):
+
+		while pos < end:
+
+			key, pos = _varint(buf, pos)
+
+			if key == (1 << 3 | _LEN):
+				length, pos = _varint(buf, pos)
+				self._parse_value(buf, pos, pos + length, step, wall_time)
+				pos += length
+			else:
+				pos = _skip(buf, pos, key & 7)
+
+	#Summary.Value: appends a row for simple_value or scalar tensors; anything else is skipped
+	def _parse_value(self, buf, pos, end, step, wall_time):
+
+		tag = None
+		value = None
+		tensor = None
+		metadata = None
+
+		while pos < end:
+
+			key, pos = _varint(buf, pos)
+			field, wire = key >> 3, key & 7
+
+			if field == 1 and wire == _LEN:
+				length, pos = _varint(buf, pos)
+				tag = bytes(buf[pos:pos+length])
+				pos += length
+
+			elif field == 2 and wire == _FIXED32:
+				value = _unpack_f32(buf, pos)[0]
+				pos += 4
+
+			elif field == 8 and wire == _LEN:
+				length, pos = _varint(buf, pos)
+				tensor = (pos, pos + length)
+				pos += length
+
+			elif field == 9 and wire == _LEN:
+				length, pos = _varint(buf, pos)
+				metadata = (pos, pos + length)
+				pos += length
+
+			else:
+				pos = _skip(buf, pos, wire)
+
+		if tag is None or (value is None and tensor is None) or not self._is_selected(tag):
+			return
+
+		if value is None:
+
+			if metadata is not None:
+
+				plugin_name, data_class = _parse_metadata(buf, metadata[0], metadata[1])
+
+				if plugin_name == 'scalars' or data_class == _DATA_CLASS_SCALAR:
+					self.scalar_tensor_tags.add(tag)
+
+			if tag not in self.scalar_tensor_tags:
+				return
+
+			#Tag listing only; no need to decode the tensor
+			if not self.decode_values:
+				self._code(tag)
+				return
+
+			value = _parse_scalar_tensor(buf, tensor[0], tensor[1])
+
+			if value is None:
+				return
+
+		if not self.decode_values:
+			self._code(tag)
+			return
+
+		code = self._code(tag)
+
+		if self.max_samples is not None:
+
+			reservoir = self.reservoirs.get(code)
+
+			if reservoir is None:
+				reservoir = self.reservoirs[code] = Reservoir(self.max_samples)
+
+			reservoir.add((step, value, wall_time))
+			return
+
+		self.codes.append(code)
+		self.steps.append(step)
+		self.values.append(value)
+		self.wall_times.append(wall_time)
+
+	#Returns the accumulated rows as columns, grouped by tag in alphabetical order (as tbparse does)
+	#>arrays are copied, so the reader can keep appending afterwards
+	def columns(self):
+
+		#Sampled rows are moved from the reservoirs to the output columns
+		for code, reservoir in self.reservoirs.items():
+
+			for step, value, wall_time in reservoir.items:
+
+				self.codes.append(code)
+				self.steps.append(step)
+				self.values.append(value)
+				self.wall_times.append(wall_time)
+
+		self.reservoirs = {}
+
+		tags = np.array(self.tags, dtype = str)
+		codes = np.array(self.codes, dtype = np.int32)
+
+		#Remap codes to the sorted tag order and group rows by tag, keeping file order inside each tag
+		tag_order = np.argsort(tags, kind = 'stable')
+		remap = np.empty(len(tags), dtype = np.int32)
+		remap[tag_order] = np.arange(len(tags), dtype = np.int32)
+		codes = remap[codes]
+		rows = np.argsort(codes, kind = 'stable')
+
+		return {
+			'tags': tags[tag_order],
+			'codes': codes[rows],
+			'step': np.array(self.steps, dtype = np.int64)[rows],
+			'value': np.array(self.values, dtype = np.float64)[rows],
+			'wall_time': np.array(self.wall_times, dtype = np.float64)[rows],
+		}
+
+
+	#Returns the rows accumulated so far as columns and forgets them; the tag dictionary is kept
+	def take(self):
+
+		columns = self.columns()
+
+		del self.codes[:]
+		del self.steps[:]
+		del self.values[:]
+		del self.wall_times[:]
+
+		return columns
+
+
+
+
+#==================== EVENTS FILE TAIL ====================
+#Follows a growing events file: every poll only decodes the records appended since the last one.
+#A trailing record that is still being written is left for the next poll.
+#>scalar_tags seeds the tags known to be scalars, since scalar tensor metadata only comes with the first event of a tag
+class EventsFileTail:
+
+	def __init__(self, path, offset = 0, scalar_tags = ()):
+
+		self.path = path
+		self.reader = TFRecordScalarReader(path)
+		self.reader.offset = offset
+		self.reader.scalar_tensor_tags.update(tag.encode('utf-8') for tag in scalar_tags)
+
+	@property
+	def offset(self):
+
+		return self.reader.offset
+
+	#Returns the columns of the newly appended scalars, or None if nothing new was written
+	def poll(self):
+
+		try:
+			size = os.stat(self.path).st_size
+		except OSError:
+			return None
+
+		#Nothing appended; a smaller file was rewritten and is not followed anymore
+		if size <= self.reader.offset:
+			return None
+
+		with open(self.path, 'rb') as f:
+
+			f.seek(self.reader.offset)
+			self.reader.read_records(f)
+
+		if len(self.reader.steps) == 0:
+			return None
+
+		return self.reader.take()
+
+
+#Convenience wrapper; reads the scalars of an events file as columns, optionally only for a tag selection
+#>max_samples caps the rows kept per tag (reservoir sampling while decoding); None keeps everything
+def read_scalars(path, check_crc = False, tags = None, max_samples = None):
+
+	return TFRecordScalarReader(path, check_crc, tags, max_samples = max_samples).read()
+
+#Applies the same per tag reservoir sampling to columns decoded by other means (tbparse)
+def sample_columns(columns, max_samples):
+
+	if not max_samples or columns is None:
+		return columns
+
+	reservoirs = [Reservoir(max_samples) for _ in columns['tags']]
+
+	for row, code in enumerate(columns['codes']):
+		reservoirs[code].add(row)
+
+	rows = np.array(sorted(row for reservoir in reservoirs for row in reservoir.items), dtype = np.int64)
+	rows = rows[np.argsort(columns['codes'][rows], kind = 'stable')]
+
+	sampled = dict(columns)
+	sampled['codes'] = columns['codes'][rows]
+	sampled['step'] = columns['step'][rows]
+	sampled['value'] = columns['value'][rows]
+
+	if 'wall_time' in columns:
+		sampled['wall_time'] = columns['wall_time'][rows]
+
+	return sampled
+
+#Cheap listing pass; returns the sorted scalar tags of an events file without decoding their values
+def list_tags(path):
+
+	reader = TFRecordScalarReader(path, values = False)
+
+	with open(path, 'rb') as f:
+		reader.read_records(f)
+
+	return sorted(reader.tags)
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk
 import re
 import copy
+from ranking import METRICS, SUMMARY_STATS
 
 #==========INFO WINDOW=============
 #Window with info on the scalar parameters 
@@ -124,10 +125,37 @@ class SelectScalarWin(tk.Toplevel):
 		self.size_options.grid(row = 5, column = 0, sticky = "NW", padx = 10, pady = 3)
 		self.size_options.config(width = 23)
 
+		#Ranking of the selected sessions on their precomputed summaries (main.py --precompute);
+		#>no events file is decoded; "None" loads every selected session
+		self.rank_label = ttk.Label(self, text = "Rank sessions by tag:")
+		self.rank_label.grid(row = 6, column = 0, sticky = "NW", padx = 10, pady = 3)
+		self.rank_tag = tk.StringVar()
+		rank_tags = ["None"] + self.parent.loader.summary_tags()
+		self.rank_tag_options = ttk.OptionMenu(self, self.rank_tag, rank_tags[0], *rank_tags)
+		self.rank_tag_options.config(width = 23)
+		self.rank_tag_options.grid(row = 7, column = 0, sticky = "NW", padx = 10, pady = 3)
+
+		self.rank_frame = ttk.Frame(self)
+		self.rank_frame.grid(row = 8, column = 0, sticky = "NW", padx = 10, pady = 3)
+		self.rank_stat = tk.StringVar()
+		self.rank_stat_options = ttk.OptionMenu(self.rank_frame, self.rank_stat, SUMMARY_STATS[0], *SUMMARY_STATS)
+		self.rank_stat_options.config(width = 5)
+		self.rank_stat_options.grid(row = 0, column = 0, sticky = "W")
+		self.rank_min_label = ttk.Label(self.rank_frame, text = "Min:")
+		self.rank_min_label.grid(row = 0, column = 1, sticky = "W", padx = (5, 0))
+		self.rank_min = tk.StringVar()
+		self.rank_min_entry = ttk.Entry(self.rank_frame, textvariable = self.rank_min, width = 6)
+		self.rank_min_entry.grid(row = 0, column = 2, sticky = "W", padx = (3, 0))
+		self.rank_top_label = ttk.Label(self.rank_frame, text = "Top:")
+		self.rank_top_label.grid(row = 0, column = 3, sticky = "W", padx = (5, 0))
+		self.rank_top = tk.StringVar()
+		self.rank_top_entry = ttk.Entry(self.rank_frame, textvariable = self.rank_top, width = 4)
+		self.rank_top_entry.grid(row = 0, column = 4, sticky = "W", padx = (3, 0))
+
 		#Select Button
 		self.select_butt = ttk.Button(self, text = "Select", command = self.select_scalar)
 		self.select_butt.place(x = 80, y = 260)
-		self.select_butt.grid(row = 6, column = 0, sticky = "NWES", padx = 70, pady = (30, 10))
+		self.select_butt.grid(row = 9, column = 0, sticky = "NWES", padx = 70, pady = (30, 10))
 
 		self.update_entries()
 		self.on_model_tag_change()
@@ -162,12 +190,28 @@ class SelectScalarWin(tk.Toplevel):
 	#Method for the Select Scalar button
 	def select_scalar(self):
 
-		#Add scalar to plot and destroy window
-		e = self.parent.append_scalar()
+		#Rank and filter the selected sessions on their summaries
+		sessions = None
+
+		if self.rank_tag.get() != "None":
+
+			loader = self.parent.loader
+			sessions = loader.select_sessions(self.parent.model_choice.get(), self.parent.reward_choice.get(), self.parent.get_size_choice[1], self.parent.get_size_choice[0])
+			sessions = loader.rank_sessions(sessions, self.rank_tag.get(), self.rank_stat.get(), self.parse_number(self.rank_min.get(), float), self.parse_number(self.rank_top.get(), int))
+
+		#Start loading the scalars in the background and destroy window
+		#>invalid data is reported by the main window once loading is over
+		self.parent.append_scalar(sessions)
 		self.on_destroy()
 
-		if e == -1:
-			tk.messagebox.showerror("Error", "Some scalars have invalid data")
+	#Parses an optional number entry; blank or invalid gives None
+	@staticmethod
+	def parse_number(text, cast):
+
+		try:
+			return cast(text)
+		except ValueError:
+			return None
 
 
 
@@ -251,12 +295,9 @@ class SelectScalarWin(tk.Toplevel):
 
 			if choice != "All":
 
-				choice = choice.strip("Ant ")
-
-				#Retrieve available reward tags from SessionLoader dict
-				for rew_tag in self.parent.loader.model_dict.get(choice):
+				#Retrieve available reward tags from the SessionLoader facet counts
+				for rew, count in self.parent.loader.reward_options(choice):
 
-					rew = rew_tag.split('|')[1]
 					self.available_rewards.append(rew)
 
 				self.available_rewards.append("All")
@@ -285,12 +326,13 @@ class SelectScalarWin(tk.Toplevel):
 
 			if choice != "All":
 
-				choice = self.parent.model_choice.get() + choice
+				model = self.parent.model_choice.get()
 
-				#Retrieve available sizes from SessionLoader dict
-				for size_tag in self.parent.loader.size_dict.get(choice):
+				#Retrieve available sizes and their session count from the SessionLoader facet counts
+				#>"All" models gives the sizes of the reward over every model
+				for size, count in self.parent.loader.size_options(model, choice):
 
-					entry = f"{size_tag[0]}, {size_tag[1]} ({size_tag[-1]})"
+					entry = f"{size[0]}, {size[1]} ({count})"
 					self.available_sizes.append(entry)
 
 				self.available_sizes.append("All")
@@ -315,7 +357,7 @@ class Preferences(tk.Toplevel):
 		tk.Tk.wm_title(self, "Preferences")
 		self.protocol('WM_DELETE_WINDOW', self.close)
 		self.resizable(tk.FALSE, tk.FALSE)
-		self.geometry("250x150")
+		self.geometry("250x400")
 
 		self.parent = parent
 
@@ -328,6 +370,46 @@ class Preferences(tk.Toplevel):
 		self.order_menu.config(width = 23)
 		self.order_menu.grid(row = 1, column = 0, padx = 20, pady = 5)
 
+		self.selective_loading = tk.BooleanVar(value = self.parent.selective_loading)
+		self.selective_check = ttk.Checkbutton(self, text = "Only load plotted tags", variable = self.selective_loading)
+		self.selective_check.grid(row = 2, column = 0, padx = 10, pady = 5, sticky = "NW")
+
+		self.debias = tk.BooleanVar(value = self.parent.plot_container.debias)
+		self.debias_check = ttk.Checkbutton(self, text = "Debias smoothing", variable = self.debias)
+		self.debias_check.grid(row = 3, column = 0, padx = 10, pady = 5, sticky = "NW")
+
+		#Per tag point budget for the next loads; 0 keeps every point
+		self.samples_frame = ttk.Frame(self)
+		self.samples_frame.grid(row = 4, column = 0, padx = 10, pady = 5, sticky = "NW")
+		self.samples_label = ttk.Label(self.samples_frame, text = "Max points per tag (0 = all):")
+		self.samples_label.grid(row = 0, column = 0, sticky = "W")
+		self.max_samples = tk.StringVar(value = str(self.parent.loader.max_samples or 0))
+		self.samples_entry = ttk.Entry(self.samples_frame, textvariable = self.max_samples, width = 7)
+		self.samples_entry.grid(row = 0, column = 1, padx = (5, 0), sticky = "W")
+
+		#Ranking metric, with its N (mean of last N) and threshold (threshold crossing step)
+		self.metric_label = ttk.Label(self, text = "Rank scalars by:")
+		self.metric_label.grid(row = 5, column = 0, padx = 10, pady = (5, 0), sticky = "NW")
+
+		self.metric_names = {label: metric for metric, label in METRICS.items()}
+		self.metric_choice = tk.StringVar()
+		self.metric_menu = ttk.OptionMenu(self, self.metric_choice, self.parent.ranking.label, *self.metric_names.keys())
+		self.metric_menu.config(width = 23)
+		self.metric_menu.grid(row = 6, column = 0, padx = 20, pady = 5)
+
+		self.metric_frame = ttk.Frame(self)
+		self.metric_frame.grid(row = 7, column = 0, padx = 10, pady = 5, sticky = "NW")
+		self.last_n_label = ttk.Label(self.metric_frame, text = "N:")
+		self.last_n_label.grid(row = 0, column = 0, sticky = "W")
+		self.last_n = tk.StringVar(value = str(self.parent.ranking.last_n))
+		self.last_n_entry = ttk.Entry(self.metric_frame, textvariable = self.last_n, width = 5)
+		self.last_n_entry.grid(row = 0, column = 1, padx = (5, 10), sticky = "W")
+		self.threshold_label = ttk.Label(self.metric_frame, text = "Threshold:")
+		self.threshold_label.grid(row = 0, column = 2, sticky = "W")
+		self.threshold = tk.StringVar(value = str(self.parent.ranking.threshold))
+		self.threshold_entry = ttk.Entry(self.metric_frame, textvariable = self.threshold, width = 7)
+		self.threshold_entry.grid(row = 0, column = 3, padx = (5, 0), sticky = "W")
+
 
 		self.save_butt = ttk.Button(self, text = "Save", command = self.save)
 		self.save_butt.grid(row = 10, column = 0, padx = 15, pady = 10, sticky = "NW")
@@ -346,6 +428,34 @@ class Preferences(tk.Toplevel):
 
 			self.parent.order_choice = None
 
+		self.parent.selective_loading = self.selective_loading.get()
+
+		#Invalid budgets are ignored
+		try:
+			max_samples = int(self.max_samples.get())
+			self.parent.loader.max_samples = max_samples if max_samples > 0 else None
+		except ValueError:
+			pass
+
+		#Ranking settings; invalid numbers are ignored
+		self.parent.ranking.metric = self.metric_names[self.metric_choice.get()]
+
+		try:
+			self.parent.ranking.last_n = max(int(self.last_n.get()), 1)
+		except ValueError:
+			pass
+
+		try:
+			self.parent.ranking.threshold = float(self.threshold.get())
+		except ValueError:
+			pass
+
+		if self.parent.plot_container.debias != self.debias.get():
+			self.parent.plot_container.debias = self.debias.get()
+			self.parent.update_plot(self.parent.get_smooth_value)
+
+		#The ordering tag may not be loaded yet
+		self.parent.ensure_tags(self.parent.order_tags(self.parent.full_tags))
 		self.parent.update_scalar_labels()
 
 		self.close()